@@ -3,7 +3,7 @@
 
 {
     "name": "Audit Log",
-    "version": "15.0.2.0.1",
+    "version": "15.0.3.0.0",
     "author": "ABF OSIELL, Odoo Community Association (OCA)",
     "license": "AGPL-3",
     "website": "https://github.com/OCA/server-tools",
@@ -16,6 +16,7 @@
         "views/auditlog_view.xml",
         "views/http_session_view.xml",
         "views/http_request_view.xml",
+        "views/auditlog_export_view.xml",
     ],
     "application": True,
     "installable": True,
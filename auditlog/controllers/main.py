@@ -0,0 +1,13 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+from odoo import http
+from odoo.http import request
+
+
+class AuditlogController(http.Controller):
+    @http.route("/auditlog/timeline", type="json", auth="user")
+    def timeline(self, model=None, res_id=None, user_id=None, limit=80, after=None):
+        """Return a page of the audit timeline of a record or of a user, see
+        `auditlog.log.get_timeline()`."""
+        return request.env["auditlog.log"].get_timeline(
+            model=model, res_id=res_id, user_id=user_id, limit=limit, after=after
+        )
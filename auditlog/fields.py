@@ -0,0 +1,29 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import json
+from functools import partial
+
+from psycopg2.extras import Json
+
+from odoo import fields
+
+
+class Jsonb(fields.Field):
+    """Field storing a JSON-serializable value in a `jsonb` column.
+
+    Values which JSON cannot represent (dates, bytes...) are stored as their
+    string representation, tuples become lists.
+    """
+
+    type = "jsonb"
+    column_type = ("jsonb", "jsonb")
+
+    def convert_to_column(self, value, record, values=None, validate=True):
+        if value is None or value is False:
+            return None
+        return Json(value, dumps=partial(json.dumps, default=str))
+
+    def convert_to_cache(self, value, record, validate=True):
+        # psycopg2 already decodes the values read from the database
+        if value is None or value is False:
+            return None
+        return value
@@ -0,0 +1,41 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import logging
+
+from odoo import tools
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50000
+OLD_COLUMNS = ("old_value", "new_value", "old_value_text", "new_value_text")
+
+
+def migrate(cr, version):
+    """Move the values of the log lines from their four text columns to the
+    `value_diff` column, by ranges of ids, then drop the text columns."""
+    if not version or not tools.column_exists(cr, "auditlog_log_line", "old_value"):
+        return
+    cr.execute("SELECT min(id), max(id) FROM auditlog_log_line")
+    min_id, max_id = cr.fetchone()
+    while min_id is not None and min_id <= max_id:
+        cr.execute(
+            """UPDATE auditlog_log_line SET value_diff = jsonb_strip_nulls(
+                jsonb_build_object(
+                    'old', old_value,
+                    'new', new_value,
+                    'old_text', CASE WHEN old_value_text IS DISTINCT FROM old_value
+                        THEN old_value_text END,
+                    'new_text', CASE WHEN new_value_text IS DISTINCT FROM new_value
+                        THEN new_value_text END
+                ))
+            WHERE id >= %s AND id < %s""",
+            (min_id, min_id + BATCH_SIZE),
+        )
+        _logger.info(
+            "auditlog: values of log lines %s to %s migrated (last id %s)",
+            min_id,
+            min_id + BATCH_SIZE - 1,
+            max_id,
+        )
+        min_id += BATCH_SIZE
+    for column in OLD_COLUMNS:
+        cr.execute('ALTER TABLE auditlog_log_line DROP COLUMN IF EXISTS "%s"' % column)
@@ -0,0 +1,14 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+from odoo import tools
+
+
+def migrate(cr, version):
+    """The line view selects the columns replaced by `value_diff`, it is
+    created again by the update."""
+    if not version:
+        return
+    kind = tools.table_kind(cr, "auditlog_log_line_view")
+    if kind == "r":
+        cr.execute("DROP TABLE auditlog_log_line_view")
+    else:
+        tools.drop_view_if_exists(cr, "auditlog_log_line_view")
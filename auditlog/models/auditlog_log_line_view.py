@@ -1,4 +1,18 @@
-from odoo import fields, models, tools
+import logging
+
+from odoo import api, fields, models, tools
+
+_logger = logging.getLogger(__name__)
+
+# Indexes of the materialized table
+MATERIALIZED_INDEXES = {
+    "model_id_res_id_create_date": ("model_id", "res_id", "create_date"),
+    "user_id_create_date": ("user_id", "create_date"),
+    "log_id": ("log_id",),
+}
+# Ids of the lines to copy into the materialized table, filled in the
+# transaction creating the lines
+PENDING_TABLE = "auditlog_log_line_view_pending"
 
 
 class AuditlogLogLineView(models.Model):
@@ -35,10 +49,7 @@ class AuditlogLogLineView(models.Model):
             alogl.write_date,
             alogl.field_id,
             alogl.log_id,
-            alogl.old_value,
-            alogl.new_value,
-            alogl.old_value_text,
-            alogl.new_value_text,
+            alogl.value_diff,
             alogl.field_name,
             alogl.field_description,
             alog.name,
@@ -62,8 +73,114 @@ class AuditlogLogLineView(models.Model):
     def _query(self):
         return "SELECT %s FROM %s" % (self._select_query(), self._from_query())
 
+    @api.model
+    def _is_materialized(self):
+        """The view is materialized into a table, refreshed incrementally,
+        when the `auditlog.materialized_line_view` system parameter is set."""
+        param = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("auditlog.materialized_line_view")
+        )
+        return tools.str2bool(param or "0")
+
     def init(self):
-        tools.drop_view_if_exists(self.env.cr, self._table)
-        self.env.cr.execute(
-            """CREATE or REPLACE VIEW %s as (%s)""" % (self._table, self._query())
+        cr = self.env.cr
+        if not self._is_materialized():
+            if tools.table_kind(cr, self._table) == "r":
+                cr.execute('DROP TABLE "%s"' % self._table)
+            cr.execute('DROP TABLE IF EXISTS "%s"' % PENDING_TABLE)
+            tools.drop_view_if_exists(cr, self._table)
+            cr.execute(
+                """CREATE or REPLACE VIEW %s as (%s)""" % (self._table, self._query())
+            )
+            return
+        if tools.table_kind(cr, self._table) == "r":
+            self._init_pending()
+            return
+        # Created empty, the rows are copied in batches by `_refresh()`
+        tools.drop_view_if_exists(cr, self._table)
+        cr.execute(
+            'CREATE TABLE "%s" AS (%s) WITH NO DATA' % (self._table, self._query())
+        )
+        cr.execute('ALTER TABLE "%s" ADD PRIMARY KEY (id)' % self._table)
+        for suffix, columns in MATERIALIZED_INDEXES.items():
+            tools.create_index(
+                cr, "%s_%s_index" % (self._table, suffix), self._table, columns
+            )
+        self._init_pending()
+        _logger.info("AUDITLOG - %s materialized", self._table)
+
+    def _init_pending(self):
+        """Create the table of the pending lines, holding the lines missing
+        from the materialized table."""
+        cr = self.env.cr
+        if tools.table_exists(cr, PENDING_TABLE):
+            return
+        cr.execute('CREATE TABLE "%s" (id integer PRIMARY KEY)' % PENDING_TABLE)
+        cr.execute(
+            """INSERT INTO "%s" SELECT alogl.id FROM auditlog_log_line alogl
+            WHERE NOT EXISTS (SELECT 1 FROM "%s" t WHERE t.id = alogl.id)"""
+            % (PENDING_TABLE, self._table)
         )
+
+    @api.model
+    def _add_pending(self, line_ids):
+        """Mark the lines to copy into the materialized table, if any."""
+        cr = self.env.cr
+        if line_ids and tools.table_kind(cr, self._table) == "r":
+            cr.execute(
+                'INSERT INTO "%s" SELECT unnest(%%s) ON CONFLICT DO NOTHING'
+                % PENDING_TABLE,
+                (list(line_ids),),
+            )
+
+    @api.model
+    def _refresh(self, limit=None):
+        """Copy the pending log lines into the materialized table, and remove
+        the rows of the lines deleted by the auto-vacuum. Return the number of
+        rows copied.
+
+        The lines are marked as pending in the transaction creating them, so
+        that the lines of a transaction committed after more recent ones are
+        copied as well. Locked pending lines are skipped so that several
+        workers can refresh the table at the same time.
+        """
+        cr = self.env.cr
+        if tools.table_kind(cr, self._table) != "r":
+            return 0
+        query = """WITH pending AS (
+                DELETE FROM "{pending}" WHERE id IN (
+                    SELECT id FROM "{pending}" ORDER BY id {limit}
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id
+            )
+            INSERT INTO "{table}" {query}
+            WHERE alogl.id IN (SELECT id FROM pending)
+            ON CONFLICT (id) DO NOTHING""".format(
+            pending=PENDING_TABLE,
+            table=self._table,
+            query=self._query(),
+            limit="LIMIT %d" % limit if limit else "",
+        )
+        cr.execute(query)
+        nb_rows = cr.rowcount
+        # The auto-vacuum deletes the oldest lines first
+        cr.execute("""DELETE FROM "%s"
+            WHERE id < (SELECT min(id) FROM auditlog_log_line)
+            OR NOT EXISTS (SELECT 1 FROM auditlog_log_line)""" % self._table)
+        self.invalidate_cache()
+        return nb_rows
+
+    @api.model
+    def _cron_refresh(self, limit=100000):
+        """Materialize the view, or restore it, according to the system
+        parameter, then refresh it. Called from a cron."""
+        is_table = tools.table_kind(self.env.cr, self._table) == "r"
+        if self._is_materialized() != is_table:
+            self.init()
+        nb_rows = self._refresh(limit=limit)
+        if nb_rows:
+            _logger.info("AUDITLOG - %s log lines materialized", nb_rows)
+        return True
@@ -1,28 +1,60 @@
 # Copyright 2016 ABF OSIELL <https://osiell.com>
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 import logging
+import threading
+import time
 from datetime import datetime, timedelta
 
 from odoo import api, fields, models
 
 _logger = logging.getLogger(__name__)
 
+# Tables purged by the SQL mode, with the condition a row must also satisfy
+# to be deleted: HTTP requests and sessions still referenced are kept
+SQL_PURGED_TABLES = (
+    ("auditlog_log", "TRUE"),
+    (
+        "auditlog_http_request",
+        "NOT EXISTS (SELECT 1 FROM auditlog_log l WHERE l.http_request_id = t.id)",
+    ),
+    (
+        "auditlog_http_session",
+        "NOT EXISTS (SELECT 1 FROM auditlog_http_request r "
+        "WHERE r.http_session_id = t.id)",
+    ),
+)
+
 
 class AuditlogAutovacuum(models.TransientModel):
     _name = "auditlog.autovacuum"
     _description = "Auditlog - Delete old logs"
 
     @api.model
-    def autovacuum(self, days, chunk_size=None):
+    def autovacuum(self, days, chunk_size=None, mode="orm", time_budget=None):
         """Delete all logs older than ``days``. This includes:
             - CRUD logs (create, read, write, unlink)
             - HTTP requests
             - HTTP user sessions
 
+        When the log tables are partitioned, the expired monthly partitions
+        are dropped as a whole first.
+
+        With ``mode="sql"``, the rows are deleted with SQL queries on ranges
+        of ``chunk_size`` ids (10000 by default), committing after each
+        range, until everything is deleted or ``time_budget`` seconds are
+        spent.
+
         Called from a cron.
         """
         days = (days > 0) and int(days) or 0
         deadline = datetime.now() - timedelta(days=days)
+        nb_partitions = self.env["auditlog.partition"]._drop_expired_partitions(
+            deadline
+        )
+        if nb_partitions:
+            _logger.info("AUTOVACUUM - %s log partitions dropped", nb_partitions)
+        if mode == "sql":
+            return self._purge_sql(deadline, chunk_size or 10000, time_budget)
         data_models = ("auditlog.log", "auditlog.http.request", "auditlog.http.session")
         for data_model in data_models:
             records = self.env[data_model].search(
@@ -35,3 +67,74 @@ class AuditlogAutovacuum(models.TransientModel):
                 records.unlink()
             _logger.info("AUTOVACUUM - %s '%s' records deleted", nb_records, data_model)
         return True
+
+    def _commit_batch(self):
+        # Tests run in a single transaction
+        if not getattr(threading.current_thread(), "testing", False):
+            self.env.cr.commit()
+
+    @api.model
+    def _purge_sql(self, deadline, batch_size, time_budget=None):
+        """Delete the rows created before ``deadline`` by ranges of
+        ``batch_size`` ids. The lines of the logs are deleted explicitly,
+        before the logs, instead of relying on the cascade."""
+        cr = self.env.cr
+        stop_time = time_budget and time.monotonic() + time_budget
+        for table, condition in SQL_PURGED_TABLES:
+            start_time = time.monotonic()
+            cr.execute(
+                "SELECT min(id), max(id) FROM %s WHERE create_date <= %%s" % table,
+                (deadline,),
+            )
+            min_id, max_id = cr.fetchone()
+            nb_rows = nb_lines = 0
+            while min_id is not None and min_id <= max_id:
+                if stop_time and time.monotonic() > stop_time:
+                    break
+                params = {
+                    "min_id": min_id,
+                    "max_id": min_id + batch_size,
+                    "deadline": deadline,
+                }
+                if table == "auditlog_log":
+                    cr.execute(
+                        """DELETE FROM auditlog_log_line WHERE log_id IN (
+                            SELECT id FROM auditlog_log
+                            WHERE id >= %(min_id)s AND id < %(max_id)s
+                            AND create_date <= %(deadline)s)""",
+                        params,
+                    )
+                    nb_lines += cr.rowcount
+                cr.execute(
+                    """DELETE FROM {table} t
+                    WHERE t.id >= %(min_id)s AND t.id < %(max_id)s
+                    AND t.create_date <= %(deadline)s AND {condition}""".format(
+                        table=table, condition=condition
+                    ),
+                    params,
+                )
+                nb_rows += cr.rowcount
+                self._commit_batch()
+                min_id += batch_size
+            duration = time.monotonic() - start_time
+            _logger.info(
+                "AUTOVACUUM - %s '%s' rows (and %s lines) deleted in %.1fs, "
+                "%.0f rows/s",
+                nb_rows,
+                table,
+                nb_lines,
+                duration,
+                (nb_rows + nb_lines) / duration if duration else 0,
+            )
+            if stop_time and time.monotonic() > stop_time:
+                _logger.info("AUTOVACUUM - time budget exhausted, stopping")
+                break
+        data_models = (
+            "auditlog.log",
+            "auditlog.log.line",
+            "auditlog.http.request",
+            "auditlog.http.session",
+        )
+        for data_model in data_models:
+            self.env[data_model].invalidate_cache()
+        return True
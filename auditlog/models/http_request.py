@@ -1,11 +1,11 @@
 # Copyright 2015 ABF OSIELL <https://osiell.com>
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
-from psycopg2.extensions import AsIs
-
 from odoo import api, fields, models
 from odoo.http import request
 
+from .http_session import memoized_log_exists
+
 
 class AuditlogHTTPRequest(models.Model):
     _name = "auditlog.http.request"
@@ -47,15 +47,9 @@ class AuditlogHTTPRequest(models.Model):
         http_session_model = self.env["auditlog.http.session"]
         httprequest = request.httprequest
         if httprequest:
-            if hasattr(httprequest, "auditlog_http_request_id"):
-                # Verify existence. Could have been rolled back after a
-                # concurrency error
-                self.env.cr.execute(
-                    "SELECT id FROM %s WHERE id = %s",
-                    (AsIs(self._table), httprequest.auditlog_http_request_id),
-                )
-                if self.env.cr.fetchone():
-                    return httprequest.auditlog_http_request_id
+            request_id = getattr(httprequest, "auditlog_http_request_id", None)
+            if request_id and memoized_log_exists(self, request_id):
+                return request_id
             vals = {
                 "name": httprequest.path,
                 "root_url": httprequest.url_root,
@@ -64,5 +58,10 @@ class AuditlogHTTPRequest(models.Model):
                 "user_context": request.context,
             }
             httprequest.auditlog_http_request_id = self.create(vals).id
+            # The record is gone if the transaction is rolled back (e.g. to
+            # retry after a concurrency error), forget it in that case
+            self.env.cr.postrollback.add(
+                lambda: setattr(httprequest, "auditlog_http_request_id", None)
+            )
             return httprequest.auditlog_http_request_id
         return False
@@ -5,6 +5,18 @@ from odoo import api, fields, models
 from odoo.http import request
 
 
+def memoized_log_exists(model, log_id):
+    """Return whether the HTTP log ``log_id`` memoized on the request still
+    exists, without any query as long as its name is in the cache of the
+    transaction. The cache is cleared when a `cr.savepoint()` is rolled
+    back, the log is then read again.
+    """
+    record = model.browse(log_id)
+    if model.env.cache.contains(record, model._fields["name"]):
+        return True
+    return bool(record.read(["name"]))
+
+
 class AuditlogtHTTPSession(models.Model):
     _name = "auditlog.http.session"
     _description = "Auditlog - HTTP User session log"
@@ -42,12 +54,25 @@ class AuditlogtHTTPSession(models.Model):
             return False
         httpsession = request.session
         if httpsession:
+            # Memoized on the HTTP request to avoid a search per log
+            httprequest = request.httprequest
+            key = (httpsession.sid, request.uid)
+            cached = getattr(httprequest, "auditlog_http_session", None)
+            if cached and cached[0] == key and memoized_log_exists(self, cached[1]):
+                return cached[1]
             existing_session = self.search(
                 [("name", "=", httpsession.sid), ("user_id", "=", request.uid)], limit=1
             )
             if existing_session:
-                return existing_session.id
-            vals = {"name": httpsession.sid, "user_id": request.uid}
-            httpsession.auditlog_http_session_id = self.create(vals).id
-            return httpsession.auditlog_http_session_id
+                session_id = existing_session.id
+            else:
+                vals = {"name": httpsession.sid, "user_id": request.uid}
+                session_id = self.create(vals).id
+                httpsession.auditlog_http_session_id = session_id
+                # Forget the record rolled back with the transaction
+                self.env.cr.postrollback.add(
+                    lambda: setattr(httprequest, "auditlog_http_session", None)
+                )
+            httprequest.auditlog_http_session = (key, session_id)
+            return session_id
         return False
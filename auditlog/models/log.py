@@ -1,8 +1,64 @@
 # Copyright 2015 ABF OSIELL <https://osiell.com>
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
-from odoo import _, api, fields, models
+import json
+from datetime import datetime
+
+from odoo import _, api, fields, models, tools
 from odoo.exceptions import UserError
 
+from ..fields import Jsonb
+
+# Keys of the values of a line in its `value_diff`, the text representations
+# are only stored when they differ from the values
+VALUE_DIFF_KEYS = {
+    "old_value": "old",
+    "new_value": "new",
+    "old_value_text": "old_text",
+    "new_value_text": "new_text",
+}
+
+# Negative operators of the searches on the values, with their positive
+SEARCH_NEGATIONS = {
+    "!=": "=",
+    "not in": "in",
+    "not like": "like",
+    "not ilike": "ilike",
+}
+
+# Indexes matching the order of the timelines of a record and of a user
+TIMELINE_INDEXES = {
+    "auditlog_log_record_timeline_index": [
+        "model_id",
+        "res_id",
+        "create_date DESC",
+        "id DESC",
+    ],
+    "auditlog_log_user_timeline_index": ["user_id", "create_date DESC", "id DESC"],
+}
+# Fields of the logs and of their lines returned by `get_timeline()`
+TIMELINE_LOG_FIELDS = [
+    "create_date",
+    "name",
+    "model_model",
+    "res_id",
+    "user_id",
+    "method",
+    "log_type",
+    "line_ids",
+]
+TIMELINE_LINE_FIELDS = [
+    "field_name",
+    "field_description",
+    "old_value_text",
+    "new_value_text",
+]
+
+
+def _value_to_text(value):
+    if value is None or value is False or isinstance(value, str):
+        return value or False
+    return str(value)
+
 
 class AuditlogLog(models.Model):
     _name = "auditlog.log"
@@ -16,6 +72,16 @@ class AuditlogLog(models.Model):
     model_name = fields.Char(readonly=True)
     model_model = fields.Char(string="Technical Model Name", readonly=True)
     res_id = fields.Integer("Resource ID")
+    res_ids = Jsonb(
+        "Resource IDs", help="IDs of the records accessed, logged by a single read log"
+    )
+    res_ids_text = fields.Text("Accessed Records", compute="_compute_res_ids_text")
+    accessed_res_id = fields.Integer(
+        "Accessed Resource ID",
+        compute="_compute_accessed_res_id",
+        search="_search_accessed_res_id",
+        help="Search the read logs listing the record in their resource IDs",
+    )
     user_id = fields.Many2one("res.users", string="User")
     method = fields.Char(size=64)
     line_ids = fields.One2many("auditlog.log.line", "log_id", string="Fields updated")
@@ -26,9 +92,98 @@ class AuditlogLog(models.Model):
         "auditlog.http.request", string="HTTP Request", index=True
     )
     log_type = fields.Selection(
-        [("full", "Full log"), ("fast", "Fast log")], string="Type"
+        [
+            ("full", "Full log"),
+            ("smart", "Smart log"),
+            ("fast", "Fast log"),
+            ("deferred", "Deferred log"),
+        ],
+        string="Type",
     )
 
+    def init(self):
+        self.env.cr.execute("""CREATE INDEX IF NOT EXISTS auditlog_log_res_ids_index
+            ON auditlog_log USING gin (res_ids jsonb_path_ops)
+            WHERE res_ids IS NOT NULL""")
+        # Keyset pagination of the timelines, see `get_timeline()`
+        for name, columns in TIMELINE_INDEXES.items():
+            tools.create_index(self.env.cr, name, self._table, columns)
+
+    @api.depends("res_ids")
+    def _compute_res_ids_text(self):
+        for log in self:
+            res_ids = log.res_ids or []
+            log.res_ids_text = ", ".join(str(id_) for id_ in res_ids) or False
+
+    def _compute_accessed_res_id(self):
+        for log in self:
+            log.accessed_res_id = log.res_id
+
+    def _search_accessed_res_id(self, operator, value):
+        if operator not in ("=", "in"):
+            raise UserError(_("Unsupported search on the accessed resource ID."))
+        res_ids = value if operator == "in" else [value]
+        if not res_ids:
+            return [("id", "=", 0)]
+        query = " OR ".join(["res_ids @> %s::jsonb"] * len(res_ids))
+        params = [json.dumps([int(res_id)]) for res_id in res_ids]
+        return [
+            ("id", "inselect", ("SELECT id FROM auditlog_log WHERE " + query, params))
+        ]
+
+    @api.model
+    def get_timeline(self, model=None, res_id=None, user_id=None, limit=80, after=None):
+        """Return a page of the logs of a record (`model` and `res_id`) or of
+        a user, the most recent first, each with its lines, as a dictionary:
+
+            {'logs': [{..., 'lines': [{...}, ...]}, ...], 'next': NEXT}
+
+        The pages are paginated on (create_date, id): pass the `next` value
+        of a page, whose date is in ISO format with its microseconds, as
+        `after` to get the next one (`next` is `None` on the last page), so
+        that deep pages are as fast as the first one.
+        """
+        if model and res_id:
+            model_id = self.env["ir.model"]._get_id(model)
+            domain = [("model_id", "=", model_id), ("res_id", "=", int(res_id))]
+        elif user_id:
+            domain = [("user_id", "=", int(user_id))]
+        else:
+            raise UserError(_("A record or a user is required to get a timeline."))
+        self.check_access_rights("read")
+        self.flush(["create_date"])
+        query = self._where_calc(domain)
+        self._apply_ir_rules(query, "read")
+        if after:
+            create_date, log_id = after
+            # At full precision: the logs of a transaction share their date
+            query.add_where(
+                '("auditlog_log"."create_date", "auditlog_log"."id") < (%s, %s)',
+                [datetime.fromisoformat(create_date), int(log_id)],
+            )
+        query.order = '"auditlog_log"."create_date" DESC, "auditlog_log"."id" DESC'
+        query.limit = limit
+        query_str, params = query.select(
+            '"auditlog_log"."id"', '"auditlog_log"."create_date"'
+        )
+        self.env.cr.execute(query_str, params)
+        rows = self.env.cr.fetchall()
+        logs = self.browse([row[0] for row in rows])
+        logs_data = logs.read(TIMELINE_LOG_FIELDS)
+        # The lines of all the logs are read at once
+        lines_data = {
+            line["id"]: line for line in logs.line_ids.read(TIMELINE_LINE_FIELDS)
+        }
+        for log_data in logs_data:
+            log_data["lines"] = [
+                lines_data[line_id] for line_id in log_data.pop("line_ids")
+            ]
+        next_key = None
+        if limit and len(logs) == limit:
+            log_id, create_date = rows[-1]
+            next_key = [create_date.isoformat(), log_id]
+        return {"logs": logs_data, "next": next_key}
+
     @api.model_create_multi
     def create(self, vals_list):
         """Insert model_name and model_model field values upon creation."""
@@ -49,6 +204,21 @@ class AuditlogLog(models.Model):
             vals.update({"model_name": model.name, "model_model": model.model})
         return super().write(vals)
 
+    def unlink(self):
+        """Remove the lines of the logs when the database cannot do it, i.e.
+        when the tables are partitioned (no foreign key), and their copy in
+        the materialized line view."""
+        if self.env["auditlog.partition"]._is_partitioned("auditlog_log_line"):
+            self.env["auditlog.log.line"].search([("log_id", "in", self.ids)]).unlink()
+        line_view = self.env["auditlog.log.line.view"]
+        if self.ids and tools.table_kind(self.env.cr, line_view._table) == "r":
+            self.env.cr.execute(
+                'DELETE FROM "%s" WHERE log_id IN %%s' % line_view._table,
+                (tuple(self.ids),),
+            )
+            line_view.invalidate_cache()
+        return super().unlink()
+
 
 class AuditlogLogLine(models.Model):
     _name = "auditlog.log.line"
@@ -60,25 +230,112 @@ class AuditlogLogLine(models.Model):
     log_id = fields.Many2one(
         "auditlog.log", string="Log", ondelete="cascade", index=True
     )
-    old_value = fields.Text()
-    new_value = fields.Text()
-    old_value_text = fields.Text("Old value Text")
-    new_value_text = fields.Text("New value Text")
+    value_diff = Jsonb(
+        help="Old and new values, with their text representation when it differs"
+    )
+    old_value = fields.Text(compute="_compute_values", search="_search_old_value")
+    new_value = fields.Text(compute="_compute_values", search="_search_new_value")
+    old_value_text = fields.Text(
+        "Old value Text", compute="_compute_values", search="_search_old_value_text"
+    )
+    new_value_text = fields.Text(
+        "New value Text", compute="_compute_values", search="_search_new_value_text"
+    )
     field_name = fields.Char("Technical name", readonly=True)
     field_description = fields.Char("Description", readonly=True)
 
+    @api.depends("value_diff")
+    def _compute_values(self):
+        for line in self:
+            diff = line.value_diff or {}
+            old_value = diff.get("old", False)
+            new_value = diff.get("new", False)
+            line.old_value = _value_to_text(old_value)
+            line.new_value = _value_to_text(new_value)
+            line.old_value_text = _value_to_text(diff.get("old_text", old_value))
+            line.new_value_text = _value_to_text(diff.get("new_text", new_value))
+
+    def _search_value(self, field_name, operator, value):
+        """Search the values of `value_diff` like the text field `field_name`,
+        the text representations falling back on the values as in
+        `_compute_values()`."""
+        key = VALUE_DIFF_KEYS[field_name]
+        expr = "value_diff->>'%s'" % key
+        if key.endswith("_text"):
+            expr = "COALESCE(%s, value_diff->>'%s')" % (expr, key[: -len("_text")])
+        negative = operator in SEARCH_NEGATIONS
+        operator = SEARCH_NEGATIONS.get(operator, operator)
+        if operator in ("=", "in"):
+            values = value if operator == "in" else [value]
+            strings = tuple(str(val) for val in values if val not in (False, None))
+            conditions = []
+            if strings:
+                conditions.append("%s IN %%s" % expr)
+            if len(strings) != len(values):
+                conditions.append("%s IS NULL" % expr)
+            condition = " OR ".join(conditions) or "FALSE"
+            params = [strings] if strings else []
+        elif operator in ("like", "ilike", "=like", "=ilike"):
+            pattern = value or ""
+            if not operator.startswith("="):
+                pattern = "%%%s%%" % pattern
+            condition = "%s %s %%s" % (expr, operator.lstrip("=").upper())
+            params = [pattern]
+        else:
+            raise UserError(_("Unsupported search on the values of the lines."))
+        query = 'SELECT id FROM "%s" WHERE %s' % (self._table, condition)
+        return [("id", "not inselect" if negative else "inselect", (query, params))]
+
+    def _search_old_value(self, operator, value):
+        return self._search_value("old_value", operator, value)
+
+    def _search_new_value(self, operator, value):
+        return self._search_value("new_value", operator, value)
+
+    def _search_old_value_text(self, operator, value):
+        return self._search_value("old_value_text", operator, value)
+
+    def _search_new_value_text(self, operator, value):
+        return self._search_value("new_value_text", operator, value)
+
+    @api.model
+    def _encode_value_diff(self, vals):
+        """Move the old and new values of `vals` to its `value_diff`. Empty
+        values and text representations equal to their value are omitted."""
+        values = {key: vals.pop(key, False) for key in VALUE_DIFF_KEYS}
+        for value_key, text_key in (
+            ("old_value", "old_value_text"),
+            ("new_value", "new_value_text"),
+        ):
+            if values[text_key] == values[value_key]:
+                values[text_key] = False
+        diff = {
+            VALUE_DIFF_KEYS[key]: value
+            for key, value in values.items()
+            if value is not False and value is not None
+        }
+        vals.setdefault("value_diff", diff)
+
     @api.model_create_multi
     def create(self, vals_list):
         """Ensure field_id is not empty on creation and store field_name and
-        field_description."""
+        field_description, and the values in `value_diff`."""
+        # Browse all the fields at once to fetch their data in one query
+        field_ids = {vals["field_id"] for vals in vals_list if vals.get("field_id")}
+        all_fields = self.env["ir.model.fields"].sudo().browse(list(field_ids))
         for vals in vals_list:
             if not vals.get("field_id"):
                 raise UserError(_("No field defined to create line."))
-            field = self.env["ir.model.fields"].sudo().browse(vals["field_id"])
+            field = all_fields.browse(vals["field_id"]).with_prefetch(
+                all_fields._prefetch_ids
+            )
             vals.update(
                 {"field_name": field.name, "field_description": field.field_description}
             )
-        return super().create(vals_list)
+            self._encode_value_diff(vals)
+        lines = super().create(vals_list)
+        self.env["auditlog.log.line.view"]._add_pending(lines.ids)
+        return lines
 
     def write(self, vals):
         """Ensure field_id is set during write and update field_name and
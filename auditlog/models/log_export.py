@@ -0,0 +1,243 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import csv
+import gzip
+import io
+import json
+import logging
+from datetime import timedelta
+
+from odoo import _, api, fields, models, tools
+
+_logger = logging.getLogger(__name__)
+
+# Columns of the exported logs, the lines of a log are exported with it
+EXPORT_COLUMNS = [
+    "id",
+    "create_date",
+    "name",
+    "model",
+    "res_id",
+    "res_ids",
+    "method",
+    "user_id",
+    "user_login",
+    "log_type",
+    "http_request_id",
+    "http_session_id",
+    "lines",
+]
+EXPORT_QUERY = """
+    SELECT
+        alog.id,
+        alog.create_date,
+        alog.name,
+        alog.model_model,
+        alog.res_id,
+        alog.res_ids,
+        alog.method,
+        alog.user_id,
+        users.login,
+        alog.log_type,
+        alog.http_request_id,
+        alog.http_session_id,
+        COALESCE(
+            (
+                SELECT jsonb_agg(
+                    jsonb_build_object(
+                        'field', alogl.field_name,
+                        'description', alogl.field_description,
+                        'values', alogl.value_diff
+                    )
+                    ORDER BY alogl.id
+                )
+                FROM auditlog_log_line alogl
+                WHERE alogl.log_id = alog.id
+            ),
+            '[]'::jsonb
+        )
+    FROM auditlog_log alog
+    LEFT JOIN res_users users ON users.id = alog.user_id
+    WHERE alog.create_date >= %(date_from)s AND alog.create_date < %(date_to)s
+    ORDER BY alog.id
+"""
+
+
+class AuditlogExportArchive(models.Model):
+    _name = "auditlog.export.archive"
+    _description = "Auditlog - Exported logs"
+    _order = "create_date DESC, id DESC"
+
+    name = fields.Char(required=True, readonly=True)
+    date_from = fields.Date("From", required=True, readonly=True)
+    date_to = fields.Date("To", required=True, readonly=True)
+    file_format = fields.Selection(
+        [("jsonl", "JSON Lines"), ("csv", "CSV")],
+        string="Format",
+        required=True,
+        readonly=True,
+    )
+    nb_logs = fields.Integer("Logs", readonly=True)
+    logs_deleted = fields.Boolean(
+        readonly=True, help="The exported logs were deleted from the database"
+    )
+    attachment_ids = fields.One2many(
+        "ir.attachment",
+        "res_id",
+        string="Files",
+        domain=[("res_model", "=", "auditlog.export.archive")],
+        readonly=True,
+    )
+
+
+class AuditlogExport(models.TransientModel):
+    _name = "auditlog.export"
+    _description = "Auditlog - Export logs to compressed files"
+
+    date_from = fields.Date("From", required=True)
+    date_to = fields.Date("To", required=True, help="Included")
+    file_format = fields.Selection(
+        [("jsonl", "JSON Lines"), ("csv", "CSV")],
+        string="Format",
+        required=True,
+        default="jsonl",
+    )
+    chunk_size = fields.Integer(
+        default=50000,
+        required=True,
+        help="Number of logs per file, which bounds the memory used",
+    )
+    delete_exported = fields.Boolean(
+        "Delete Exported Logs",
+        help="Delete the logs and their lines once they are exported",
+    )
+    archive_id = fields.Many2one("auditlog.export.archive", readonly=True)
+    attachment_ids = fields.One2many(related="archive_id.attachment_ids")
+
+    def _serialize_chunk(self, rows):
+        """Return the gzip-compressed content of a file holding `rows`."""
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode="wb") as gzip_file:
+            text_file = io.TextIOWrapper(gzip_file, encoding="utf-8", newline="")
+            if self.file_format == "csv":
+                writer = csv.writer(text_file)
+                writer.writerow(EXPORT_COLUMNS)
+                for row in rows:
+                    row = list(row)
+                    row[5] = row[5] and json.dumps(row[5])
+                    row[-1] = json.dumps(row[-1])
+                    writer.writerow(row)
+            else:
+                for row in rows:
+                    text_file.write(
+                        json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str)
+                    )
+                    text_file.write("\n")
+            text_file.flush()
+            text_file.detach()
+        return buffer.getvalue()
+
+    def _create_attachment(self, archive, part, rows):
+        name = "%s_%03d.%s.gz" % (archive.name, part, self.file_format)
+        return self.env["ir.attachment"].create(
+            {
+                "name": name,
+                "raw": self._serialize_chunk(rows),
+                "mimetype": "application/gzip",
+                "res_model": archive._name,
+                "res_id": archive.id,
+            }
+        )
+
+    def _delete_exported(self, params):
+        """Delete the exported logs, their lines and their copy in the
+        materialized line view."""
+        cr = self.env.cr
+        exported = """SELECT id FROM auditlog_log
+            WHERE create_date >= %(date_from)s AND create_date < %(date_to)s
+            AND id <= %(max_id)s"""
+        line_view_table = self.env["auditlog.log.line.view"]._table
+        if tools.table_kind(cr, line_view_table) == "r":
+            cr.execute(
+                'DELETE FROM "%s" WHERE log_id IN (%s)' % (line_view_table, exported),
+                params,
+            )
+        cr.execute(
+            "DELETE FROM auditlog_log_line WHERE log_id IN (%s)" % exported, params
+        )
+        cr.execute("DELETE FROM auditlog_log WHERE id IN (%s)" % exported, params)
+        nb_logs = cr.rowcount
+        for model in ("auditlog.log", "auditlog.log.line", "auditlog.log.line.view"):
+            self.env[model].invalidate_cache()
+        return nb_logs
+
+    def action_export(self):
+        """Stream the logs of the period, with their lines, into compressed
+        attachments of `chunk_size` logs each, attached to an archive which
+        outlives the wizard. The logs are read through a server-side cursor,
+        so that only one chunk is held in memory."""
+        self.ensure_one()
+        self.env["base"].flush()
+        archive = self.env["auditlog.export.archive"].create(
+            {
+                "name": "auditlog_%s_%s" % (self.date_from, self.date_to),
+                "date_from": self.date_from,
+                "date_to": self.date_to,
+                "file_format": self.file_format,
+            }
+        )
+        params = {
+            "date_from": self.date_from,
+            "date_to": self.date_to + timedelta(days=1),
+            "max_id": 0,
+        }
+        attachments = self.env["ir.attachment"]
+        nb_logs = 0
+        # A named cursor of the connection of the transaction
+        with self.env.cr._cnx.cursor("auditlog_export_%s" % self.id) as export_cr:
+            export_cr.itersize = self.chunk_size
+            export_cr.execute(EXPORT_QUERY, params)
+            while True:
+                rows = export_cr.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+                attachments |= self._create_attachment(
+                    archive, len(attachments) + 1, rows
+                )
+                nb_logs += len(rows)
+                params["max_id"] = rows[-1][0]
+        _logger.info(
+            "AUDITLOG - %s logs from %s to %s exported in %s files",
+            nb_logs,
+            self.date_from,
+            self.date_to,
+            len(attachments),
+        )
+        archive.nb_logs = nb_logs
+        if self.delete_exported and nb_logs:
+            nb_deleted = self._delete_exported(params)
+            archive.logs_deleted = True
+            _logger.info("AUDITLOG - %s exported logs deleted", nb_deleted)
+        self.archive_id = archive
+        return {
+            "name": _("Export Logs"),
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
+
+    @api.model
+    def _cron_export_last_month(self, file_format="jsonl", delete_exported=False):
+        """Export the logs of the previous month. Called from a cron."""
+        date_to = fields.Date.today().replace(day=1) - timedelta(days=1)
+        export = self.create(
+            {
+                "date_from": date_to.replace(day=1),
+                "date_to": date_to,
+                "file_format": file_format,
+                "delete_exported": delete_exported,
+            }
+        )
+        export.action_export()
+        return True
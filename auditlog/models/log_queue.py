@@ -0,0 +1,142 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import json
+import logging
+import threading
+import time
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+
+def _int_keys(values):
+    """JSON turns the integer keys into strings, restore them."""
+    return {int(key): value for key, value in values.items()}
+
+
+class AuditlogLogQueue(models.Model):
+    _name = "auditlog.log.queue"
+    _description = "Auditlog - Deferred logs to process"
+    _order = "id"
+
+    kind = fields.Selection(
+        [
+            ("deferred", "Deferred logs"),
+            ("coalesced", "Coalesced writes"),
+            ("read", "Read accesses"),
+        ],
+        required=True,
+        default="deferred",
+        help="Only the deferred logs are processed by the scheduled action, "
+        "the other entries are staged by a transaction and processed before "
+        "its commit",
+    )
+    model_id = fields.Many2one("ir.model", string="Model", ondelete="set null")
+    res_model = fields.Char("Technical Model Name", required=True)
+    method = fields.Char(size=64)
+    user_id = fields.Many2one("res.users", string="User")
+    http_session_id = fields.Many2one("auditlog.http.session", string="Session")
+    http_request_id = fields.Many2one("auditlog.http.request", string="HTTP Request")
+    data = fields.Text(help="Records and values to log, JSON encoded")
+    error = fields.Text(
+        readonly=True, help="Error raised while processing the entry, which is skipped"
+    )
+
+    def _process(self):
+        """Create the logs of the queued operations, then remove them from
+        the queue. An entry which cannot be processed is kept with its
+        error and skipped afterwards, so that it does not block the
+        queue."""
+        rule_model = self.env["auditlog.rule"].sudo().with_context(auditlog_flush=True)
+        model_cache = self.pool._auditlog_model_cache
+        processed = self.browse()
+        for entry in self:
+            if entry.res_model not in self.env:
+                _logger.warning(
+                    "Auditlog: model %s does not exist anymore, deferred logs "
+                    "of queue entry %s are dropped",
+                    entry.res_model,
+                    entry.id,
+                )
+                processed |= entry
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    entry._process_entry(rule_model, model_cache)
+            except Exception as e:
+                _logger.exception(
+                    "Auditlog: deferred logs of queue entry %s cannot be created",
+                    entry.id,
+                )
+                self.env.clear()
+                self.env.cr.execute(
+                    "UPDATE auditlog_log_queue SET error = %s WHERE id = %s",
+                    (str(e) or repr(e), entry.id),
+                )
+                continue
+            processed |= entry
+        processed.unlink()
+
+    def _process_entry(self, rule_model, model_cache):
+        self.ensure_one()
+        if self.res_model not in model_cache:
+            # The rule has been unsubscribed since the operation
+            model_cache[self.res_model] = self.model_id.id
+        data = json.loads(self.data)
+        log_values = dict(
+            data["log_values"] or {},
+            http_request_id=self.http_request_id.id,
+            http_session_id=self.http_session_id.id,
+        )
+        rule_model.create_logs(
+            self.user_id.id,
+            self.res_model,
+            data["res_ids"],
+            self.method,
+            _int_keys(data["old_values"]),
+            _int_keys(data["new_values"]),
+            log_values,
+            res_names=_int_keys(data["res_names"]),
+        )
+        self.env["base"].flush()
+
+    def _commit_batch(self):
+        # Tests run in a single transaction
+        if not getattr(threading.current_thread(), "testing", False):
+            self.env.cr.commit()
+
+    @api.model
+    def _cron_process_queue(self, limit=1000, time_budget=240):
+        """Process the queue by batches of ``limit`` entries, oldest first,
+        committing after each batch, until it is empty or ``time_budget``
+        seconds are spent. The cron is triggered again if entries remain.
+        Called from a cron.
+
+        Locked rows are skipped so that several workers can process the
+        queue at the same time.
+        """
+        stop_time = time_budget and time.monotonic() + time_budget
+        nb_entries = 0
+        while True:
+            self.env.cr.execute(
+                """SELECT id FROM auditlog_log_queue
+                WHERE kind = 'deferred' AND error IS NULL
+                ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED""",
+                (limit,),
+            )
+            entries = self.browse([row[0] for row in self.env.cr.fetchall()])
+            if not entries:
+                break
+            entries._process()
+            self.env["auditlog.log.line.view"]._refresh()
+            self._commit_batch()
+            nb_entries += len(entries)
+            if stop_time and time.monotonic() > stop_time:
+                cron = self.env.ref(
+                    "auditlog.ir_cron_auditlog_process_queue", raise_if_not_found=False
+                )
+                if cron:
+                    cron._trigger()
+                break
+        _logger.info("AUDITLOG - %s deferred log entries processed", nb_entries)
+        return True
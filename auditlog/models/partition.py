@@ -0,0 +1,195 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import logging
+import re
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models, tools
+
+_logger = logging.getLogger(__name__)
+
+# Tables partitioned on `create_date`, the lines first as they reference
+# the logs
+PARTITIONED_TABLES = ("auditlog_log_line", "auditlog_log")
+
+
+class AuditlogPartition(models.AbstractModel):
+    _name = "auditlog.partition"
+    _description = "Auditlog - Monthly partitions of the log tables"
+
+    @api.model
+    def _is_enabled(self):
+        """Partitioning is enabled by the `auditlog.partitioning` system
+        parameter."""
+        param = (
+            self.env["ir.config_parameter"].sudo().get_param("auditlog.partitioning")
+        )
+        return tools.str2bool(param or "0")
+
+    @api.model
+    def _is_partitioned(self, table):
+        return tools.table_kind(self.env.cr, table) == "p"
+
+    @api.model
+    def _partition_name(self, table, month):
+        return "%s_y%04dm%02d" % (table, month.year, month.month)
+
+    @api.model
+    def _get_partitions(self, table):
+        """Return the monthly partitions of the table as a list of
+        (PARTITION_NAME, FIRST_DAY_OF_THE_MONTH) tuples."""
+        self.env.cr.execute(
+            """SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s""",
+            (table,),
+        )
+        pattern = re.compile(r"^%s_y(\d{4})m(\d{2})$" % re.escape(table))
+        partitions = []
+        for (name,) in self.env.cr.fetchall():
+            match = pattern.match(name)
+            if match:
+                month = date(int(match.group(1)), int(match.group(2)), 1)
+                partitions.append((name, month))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    @api.model
+    def _create_partitions(self, table, date_from, date_to):
+        """Create the missing monthly partitions of the table from the month
+        of `date_from` to the month of `date_to` included."""
+        cr = self.env.cr
+        month = date_from.replace(day=1)
+        while month <= date_to:
+            next_month = month + relativedelta(months=1)
+            name = self._partition_name(table, month)
+            if not tools.table_exists(cr, name):
+                self._create_partition(table, name, month, next_month)
+            month = next_month
+
+    @api.model
+    def _create_partition(self, table, name, month, next_month):
+        """Create the partition of the month. PostgreSQL refuses to create it
+        while the default partition holds rows of the month: the default
+        partition is then detached, its rows of the month are moved to the
+        new partition and it is attached back."""
+        cr = self.env.cr
+        default = "%s_default" % table
+        params = {"date_from": month, "date_to": next_month}
+        cr.execute(
+            """SELECT 1 FROM "%s"
+            WHERE create_date >= %%(date_from)s AND create_date < %%(date_to)s
+            LIMIT 1""" % default,
+            params,
+        )
+        if not cr.fetchone():
+            cr.execute("""CREATE TABLE "%s" PARTITION OF "%s"
+                FOR VALUES FROM ('%s') TO ('%s')""" % (name, table, month, next_month))
+            return
+        cr.execute('ALTER TABLE "%s" DETACH PARTITION "%s"' % (table, default))
+        cr.execute("""CREATE TABLE "%s" PARTITION OF "%s"
+            FOR VALUES FROM ('%s') TO ('%s')""" % (name, table, month, next_month))
+        cr.execute(
+            """WITH moved AS (
+                DELETE FROM "%s"
+                WHERE create_date >= %%(date_from)s AND create_date < %%(date_to)s
+                RETURNING *
+            )
+            INSERT INTO "%s" SELECT * FROM moved""" % (default, name),
+            params,
+        )
+        _logger.info(
+            "AUDITLOG - %s rows moved from %s to %s", cr.rowcount, default, name
+        )
+        cr.execute('ALTER TABLE "%s" ATTACH PARTITION "%s" DEFAULT' % (table, default))
+
+    @api.model
+    def _convert_table(self, table, months_ahead):
+        """Replace the table by a table partitioned by month on
+        `create_date`, holding the same data.
+
+        The foreign keys referencing the table or defined on it are lost:
+        PostgreSQL requires the partition key in the unique constraint of a
+        referenced table, and Odoo does not create foreign keys on tables
+        which are not ordinary ones.
+        """
+        cr = self.env.cr
+        legacy = "%s_unpartitioned" % table
+        cr.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s",
+            (table,),
+        )
+        # Unique indexes would need the partition key
+        indexes = [
+            definition
+            for __, definition in cr.fetchall()
+            if not definition.startswith("CREATE UNIQUE")
+        ]
+        cr.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+        sequence = cr.fetchone()[0]
+        cr.execute('ALTER TABLE "%s" RENAME TO "%s"' % (table, legacy))
+        query = """UPDATE "%s" SET create_date = COALESCE(write_date, now())
+            WHERE create_date IS NULL"""
+        cr.execute(query % legacy)
+        query = """CREATE TABLE "%s" (LIKE "%s" INCLUDING DEFAULTS)
+            PARTITION BY RANGE (create_date)"""
+        cr.execute(query % (table, legacy))
+        cr.execute('ALTER TABLE "%s" ALTER COLUMN create_date SET NOT NULL' % table)
+        cr.execute('ALTER TABLE "%s" ADD PRIMARY KEY (id, create_date)' % table)
+        if sequence:
+            cr.execute('ALTER SEQUENCE %s OWNED BY "%s".id' % (sequence, table))
+        cr.execute(
+            'CREATE TABLE "%s_default" PARTITION OF "%s" DEFAULT' % (table, table)
+        )
+        cr.execute('SELECT min(create_date) FROM "%s"' % legacy)
+        date_from = fields.Date.to_date(cr.fetchone()[0]) or fields.Date.today()
+        self._create_partitions(
+            table, date_from, fields.Date.today() + relativedelta(months=months_ahead)
+        )
+        cr.execute('INSERT INTO "%s" SELECT * FROM "%s"' % (table, legacy))
+        cr.execute('DROP TABLE "%s" CASCADE' % legacy)
+        for definition in indexes:
+            cr.execute(definition.replace(legacy, table))
+        _logger.info("AUDITLOG - table %s partitioned by month", table)
+
+    @api.model
+    def _cron_manage_partitions(self, months_ahead=3):
+        """Partition the log tables if partitioning is enabled and create
+        the partitions of the upcoming months. Called from a cron."""
+        if not self._is_enabled():
+            return True
+        converted = False
+        for table in PARTITIONED_TABLES:
+            if not self._is_partitioned(table):
+                self._convert_table(table, months_ahead)
+                converted = True
+            self._create_partitions(
+                table,
+                fields.Date.today(),
+                fields.Date.today() + relativedelta(months=months_ahead),
+            )
+        if converted:
+            # The SQL view on the lines was dropped with the former table
+            self.env["auditlog.log.line.view"].init()
+        return True
+
+    @api.model
+    def _drop_expired_partitions(self, deadline):
+        """Detach and drop the monthly partitions of the log tables which
+        only hold rows created before `deadline`. Return the number of
+        partitions dropped."""
+        nb_partitions = 0
+        for table in PARTITIONED_TABLES:
+            if not self._is_partitioned(table):
+                continue
+            for name, month in self._get_partitions(table):
+                if month + relativedelta(months=1) > deadline.date():
+                    break
+                self.env.cr.execute(
+                    'ALTER TABLE "%s" DETACH PARTITION "%s"' % (table, name)
+                )
+                self.env.cr.execute('DROP TABLE "%s"' % name)
+                nb_partitions += 1
+        return nb_partitions
@@ -2,10 +2,17 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
 import copy
+import hashlib
+import json
+import random
+import time
+from collections import defaultdict, namedtuple
 
-from odoo import _, api, fields, models, modules
+from odoo import _, api, fields, models, modules, tools
 from odoo.exceptions import UserError
 
+from .log_queue import _int_keys
+
 FIELDS_BLACKLIST = [
     "id",
     "create_uid",
@@ -15,9 +22,59 @@ FIELDS_BLACKLIST = [
     "display_name",
     "__last_update",
 ]
+# Same, as a set for the lookups
+FIELDS_BLACKLIST_SET = frozenset(FIELDS_BLACKLIST)
 # Used for performance, to avoid a dictionary instanciation when we need an
 # empty dict to simplify algorithms
 EMPTY_DICT = {}
+# Key of the queue entries staging the coalesced writes of a transaction
+COALESCED_WRITES_KEY = "auditlog.coalesced_writes"
+# Key of the queue entries staging the records read in a transaction
+READ_ACCESS_KEY = "auditlog.read_access"
+# Duration of the window of the rate limit of read logs, in seconds
+READ_RATE_WINDOW = 60
+# Log types making a diff between the data before and after the operation
+DIFF_LOG_TYPES = ("full", "smart")
+# Configuration of a rule, as cached in the registry
+RuleConfig = namedtuple(
+    "RuleConfig",
+    [
+        "id",
+        "log_type",
+        "log_read",
+        "log_write",
+        "log_unlink",
+        "log_create",
+        "log_read_mode",
+        "read_sample_rate",
+        "read_rate_limit",
+        "coalesce_writes",
+        "snapshot_mode",
+        "import_log_mode",
+        "import_sample_size",
+        "capture_record",
+        "users_to_exclude",
+        "fields_to_exclude",
+        "excluded_fields",
+    ],
+)
+
+# Data of an `ir.model.fields` record needed to log a field, as cached in the
+# registry
+FieldInfo = namedtuple("FieldInfo", ["id", "name", "relation", "ttype"])
+
+
+class PendingNames(object):
+    """Placeholder for the `name_get()` of related records in the values of
+    a log line. The placeholders of a whole batch of log lines are resolved
+    at once by `AuditlogRule._resolve_pending_names()`.
+    """
+
+    __slots__ = ("relation", "ids")
+
+    def __init__(self, relation, ids):
+        self.relation = relation
+        self.ids = list(ids or [])
 
 
 class DictDiffer(object):
@@ -79,6 +136,32 @@ class AuditlogRule(models.Model):
         ),
         states={"subscribed": [("readonly", True)]},
     )
+    log_read_mode = fields.Selection(
+        [("full", "Full"), ("ids", "Accessed records")],
+        string="Read Log Mode",
+        required=True,
+        default="full",
+        help=(
+            "Full: log every read with the values of the fields read\n"
+            "Accessed records: log one row per user, model and transaction "
+            "listing the ids of the records read"
+        ),
+        states={"subscribed": [("readonly", True)]},
+    )
+    read_sample_rate = fields.Float(
+        "Read Sampling Rate",
+        default=1.0,
+        help="Fraction of the reads which are logged, between 0 and 1",
+        states={"subscribed": [("readonly", True)]},
+    )
+    read_rate_limit = fields.Integer(
+        "Read Logs per Minute",
+        help=(
+            "Maximum number of reads logged per user and per minute on each "
+            "server worker, 0 for no limit"
+        ),
+        states={"subscribed": [("readonly", True)]},
+    )
     log_write = fields.Boolean(
         "Log Writes",
         default=True,
@@ -107,7 +190,12 @@ class AuditlogRule(models.Model):
         states={"subscribed": [("readonly", True)]},
     )
     log_type = fields.Selection(
-        [("full", "Full log"), ("fast", "Fast log")],
+        [
+            ("full", "Full log"),
+            ("smart", "Smart log"),
+            ("fast", "Fast log"),
+            ("deferred", "Deferred log"),
+        ],
         string="Type",
         required=True,
         default="full",
@@ -115,8 +203,14 @@ class AuditlogRule(models.Model):
             "Full log: make a diff between the data before and after "
             "the operation (log more info like computed fields which were "
             "updated, but it is slower)\n"
+            "Smart log: same as the full log, but on write only the "
+            "written fields and the stored computed fields depending on "
+            "them are compared\n"
             "Fast log: only log the changes made through the create and "
-            "write operations (less information, but it is faster)"
+            "write operations (less information, but it is faster)\n"
+            "Deferred log: capture the same changes as the fast log, but "
+            "only queue them with the operation, the logs are created "
+            "later by a scheduled action"
         ),
         states={"subscribed": [("readonly", True)]},
     )
@@ -134,6 +228,46 @@ class AuditlogRule(models.Model):
     capture_record = fields.Boolean(
         help="Select this if you want to keep track of Unlink Record",
     )
+    snapshot_mode = fields.Selection(
+        [("deepcopy", "Deep copy"), ("shallow", "Audited values")],
+        string="Create Snapshot",
+        required=True,
+        default="deepcopy",
+        help=(
+            "How the fast and deferred logs keep the values given to create:\n"
+            "Deep copy: a full copy of the values\n"
+            "Audited values: only the values of the audited fields, without "
+            "copying the scalar values, and the size and hash of binary "
+            "values instead of their content (faster on large imports)"
+        ),
+        states={"subscribed": [("readonly", True)]},
+    )
+    import_log_mode = fields.Selection(
+        [("full", "Full"), ("summary", "Summary")],
+        string="Import Log Mode",
+        required=True,
+        default="full",
+        help=(
+            "How the records created by an import are logged:\n"
+            "Full: one log per record, as for any other creation\n"
+            "Summary: one log per batch of imported records listing their "
+            "ids, and the usual logs for a sample of them only"
+        ),
+        states={"subscribed": [("readonly", True)]},
+    )
+    import_sample_size = fields.Integer(
+        default=10,
+        help="Number of records of each imported batch logged in full",
+        states={"subscribed": [("readonly", True)]},
+    )
+    coalesce_writes = fields.Boolean(
+        help=(
+            "Select this to log all the writes on a record during a "
+            "transaction in a single log, with the values before the first "
+            "write and after the last one"
+        ),
+        states={"subscribed": [("readonly", True)]},
+    )
     users_to_exclude_ids = fields.Many2many(
         "res.users",
         string="Users to Exclude",
@@ -156,7 +290,22 @@ class AuditlogRule(models.Model):
                 "There is already a rule defined on this model\n"
                 "You cannot define another: please edit the existing one."
             ),
-        )
+        ),
+        (
+            "read_sample_rate_range",
+            "CHECK(read_sample_rate > 0 AND read_sample_rate <= 1)",
+            "The read sampling rate must be greater than 0 and at most 1.",
+        ),
+        (
+            "import_sample_size_positive",
+            "CHECK(import_sample_size >= 0)",
+            "The import sample size cannot be negative.",
+        ),
+        (
+            "read_rate_limit_positive",
+            "CHECK(read_rate_limit >= 0)",
+            "The number of read logs per minute cannot be negative.",
+        ),
     ]
 
     def _register_hook(self):
@@ -166,10 +315,23 @@ class AuditlogRule(models.Model):
             self.pool._auditlog_field_cache = {}
         if not hasattr(self.pool, "_auditlog_model_cache"):
             self.pool._auditlog_model_cache = {}
+        if not hasattr(self.pool, "_auditlog_read_counters"):
+            self.pool._auditlog_read_counters = {}
         if not self:
             self = self.search([("state", "=", "subscribed")])
+        self._warm_field_cache()
         return self._patch_methods()
 
+    def _warm_field_cache(self):
+        """Load the fields of the models of the rules in the registry cache,
+        so that the workers do not fetch them while logging."""
+        cache = self.pool._auditlog_field_cache
+        for rule in self:
+            model_name = rule.model_id.model
+            if rule.state == "subscribed" and model_name in self.pool:
+                if model_name not in cache:
+                    self._load_field_cache(model_name)
+
     def _patch_methods(self):
         """Patch ORM methods of models defined in rules to log their calls."""
         updated = False
@@ -206,6 +368,15 @@ class AuditlogRule(models.Model):
                 model_model._patch_method("unlink", rule._make_unlink())
                 setattr(type(model_model), check_attr, True)
                 updated = True
+            #   -> load, to summarize the logs of the records it creates and
+            #      to log the HTTP request outside of its savepoints
+            check_attr = "auditlog_ruled_load"
+            if (rule.log_create or rule.log_write) and not hasattr(
+                model_model, check_attr
+            ):
+                model_model._patch_method("load", rule._make_load())
+                setattr(type(model_model), check_attr, True)
+                updated = True
         return updated
 
     def _revert_methods(self):
@@ -220,6 +391,10 @@ class AuditlogRule(models.Model):
                     model_model._revert_method(method)
                     delattr(type(model_model), "auditlog_ruled_%s" % method)
                     updated = True
+            if hasattr(type(model_model), "auditlog_ruled_load"):
+                model_model._revert_method("load")
+                delattr(type(model_model), "auditlog_ruled_load")
+                updated = True
         if updated:
             modules.registry.Registry(self.env.cr.dbname).signal_changes()
 
@@ -231,6 +406,7 @@ class AuditlogRule(models.Model):
         model = self.env["ir.model"].sudo().browse(vals["model_id"])
         vals.update({"model_name": model.name, "model_model": model.model})
         new_record = super().create(vals)
+        self.clear_caches()
         if new_record._register_hook():
             modules.registry.Registry(self.env.cr.dbname).signal_changes()
         return new_record
@@ -243,6 +419,7 @@ class AuditlogRule(models.Model):
             model = self.env["ir.model"].sudo().browse(vals["model_id"])
             vals.update({"model_name": model.name, "model_model": model.model})
         res = super().write(vals)
+        self.clear_caches()
         if self._register_hook():
             modules.registry.Registry(self.env.cr.dbname).signal_changes()
         return res
@@ -250,7 +427,164 @@ class AuditlogRule(models.Model):
     def unlink(self):
         """Unsubscribe rules before removing them."""
         self.unsubscribe()
-        return super(AuditlogRule, self).unlink()
+        res = super(AuditlogRule, self).unlink()
+        self.clear_caches()
+        return res
+
+    @api.model
+    @tools.ormcache("model_name")
+    def _get_rule_config(self, model_name):
+        """Return the configuration of the rule of a model as a `RuleConfig`,
+        or `None` if the model has no rule.
+
+        The result is cached in the registry, the cache is cleared (and the
+        other workers are signaled) whenever a rule is created, updated or
+        removed.
+        """
+        rule = self.sudo().search([("model_id.model", "=", model_name)], limit=1)
+        if not rule:
+            return None
+        fields_to_exclude = rule.fields_to_exclude_ids.mapped("name")
+        return RuleConfig(
+            id=rule.id,
+            log_type=rule.log_type,
+            log_read=rule.log_read,
+            log_write=rule.log_write,
+            log_unlink=rule.log_unlink,
+            log_create=rule.log_create,
+            log_read_mode=rule.log_read_mode,
+            read_sample_rate=rule.read_sample_rate,
+            read_rate_limit=rule.read_rate_limit,
+            coalesce_writes=rule.coalesce_writes,
+            snapshot_mode=rule.snapshot_mode,
+            import_log_mode=rule.import_log_mode,
+            import_sample_size=rule.import_sample_size,
+            capture_record=rule.capture_record,
+            users_to_exclude=frozenset(rule.users_to_exclude_ids.ids),
+            fields_to_exclude=frozenset(fields_to_exclude),
+            excluded_fields=FIELDS_BLACKLIST_SET.union(fields_to_exclude),
+        )
+
+    @api.model
+    def _is_user_excluded(self, model_name):
+        """Return whether the operations of the current user on the model
+        are excluded from the logs."""
+        config = self._get_rule_config(model_name)
+        return config is not None and self.env.uid in config.users_to_exclude
+
+    @api.model
+    def _get_import_sample_size(self, model_name):
+        """Return the number of records to log in full among the records
+        being created, when they are imported by `load()` (e.g. by the
+        import of a file) and the rule summarizes imports, or `None` if all
+        the records are logged."""
+        context = self.env.context
+        if not context.get("auditlog_import") and not context.get("import_file"):
+            return None
+        config = self._get_rule_config(model_name)
+        if config is None or config.import_log_mode != "summary":
+            return None
+        return config.import_sample_size
+
+    @api.model
+    def _log_import_summary(self, uid, res_model, res_ids, log_type):
+        """Create the single log listing the ids of a batch of imported
+        records."""
+        if not res_ids:
+            return self.env["auditlog.log"]
+        http_request_model = self.env["auditlog.http.request"]
+        http_session_model = self.env["auditlog.http.session"]
+        return self.env["auditlog.log"].create(
+            {
+                "name": _("Import of %s records") % len(res_ids),
+                "model_id": self.pool._auditlog_model_cache[res_model],
+                "res_ids": list(res_ids),
+                "method": "create",
+                "user_id": uid,
+                "http_request_id": http_request_model.current_http_request(),
+                "http_session_id": http_session_model.current_http_session(),
+                "log_type": log_type,
+            }
+        )
+
+    @api.model
+    def _is_read_logged(self, model_name):
+        """Return whether the current read on the model is logged, according
+        to the sampling rate and the rate limit of its rule.
+
+        The rate limit is counted per worker, in a fixed window of
+        `READ_RATE_WINDOW` seconds.
+        """
+        config = self._get_rule_config(model_name)
+        if config is None:
+            return False
+        if config.read_sample_rate < 1 and random.random() >= config.read_sample_rate:
+            return False
+        if config.read_rate_limit:
+            counters = self.pool._auditlog_read_counters
+            key = (self.env.uid, model_name)
+            now = time.monotonic()
+            window_start, count = counters.get(key, (now, 0))
+            if now - window_start >= READ_RATE_WINDOW:
+                window_start, count = now, 0
+            if count >= config.read_rate_limit:
+                return False
+            counters[key] = (window_start, count + 1)
+        return True
+
+    @api.model
+    def _log_read_access(self, uid, res_model, res_ids):
+        """Stage the ids of the records read in the current transaction.
+        One log per user and model lists them all, it is created right
+        before the commit."""
+        http_request_model = self.env["auditlog.http.request"]
+        http_session_model = self.env["auditlog.http.session"]
+        self._stage_entry(
+            READ_ACCESS_KEY,
+            self._flush_read_access,
+            {
+                "kind": "read",
+                "model_id": self.pool._auditlog_model_cache[res_model],
+                "res_model": res_model,
+                "method": "read",
+                "user_id": uid,
+                "http_request_id": http_request_model.current_http_request(),
+                "http_session_id": http_session_model.current_http_session(),
+                "data": json.dumps({"res_ids": list(res_ids)}),
+            },
+        )
+
+    def _flush_read_access(self):
+        """Create the logs of the records read in the transaction."""
+        entries = self._pop_staged_entries(READ_ACCESS_KEY)
+        accesses = {}
+        for entry in entries:
+            key = (
+                entry.user_id.id,
+                entry.res_model,
+                entry.http_request_id.id,
+                entry.http_session_id.id,
+            )
+            accesses.setdefault(key, set()).update(json.loads(entry.data)["res_ids"])
+        entries.unlink()
+        vals_list = []
+        for key, res_ids in accesses.items():
+            uid, res_model, http_request_id, http_session_id = key
+            config = self._get_rule_config(res_model)
+            vals_list.append(
+                {
+                    "name": _("%s records") % len(res_ids),
+                    "model_id": self.pool._auditlog_model_cache[res_model],
+                    "res_ids": sorted(res_ids),
+                    "method": "read",
+                    "user_id": uid,
+                    "http_request_id": http_request_id,
+                    "http_session_id": http_session_id,
+                    "log_type": config.log_type if config else False,
+                }
+            )
+        if vals_list:
+            self.env["auditlog.log"].sudo().create(vals_list)
 
     @api.model
     def get_auditlog_fields(self, model):
@@ -265,11 +599,144 @@ class AuditlogRule(models.Model):
             if (not f.compute and not f.related) or f.store
         )
 
+    @api.model
+    def get_auditlog_write_fields(self, model, vals):
+        """
+        Get the list of auditlog fields for a model which can be modified
+        by writing `vals`: the written fields and the stored computed fields
+        depending on them, found in the field dependency graph.
+        """
+        auditlog_fields = set(self.get_auditlog_fields(model))
+        result = {name for name in vals if name in auditlog_fields}
+        field_triggers = self.pool.field_triggers
+        for name in vals:
+            field = model._fields.get(name)
+            todo = [field_triggers.get(field, EMPTY_DICT)] if field else []
+            while todo:
+                tree = todo.pop()
+                for key, value in tree.items():
+                    if key is None:
+                        result.update(
+                            dependent.name
+                            for dependent in value
+                            if dependent.model_name == model._name
+                            and dependent.name in auditlog_fields
+                        )
+                    else:
+                        todo.append(value)
+        return list(result)
+
+    @api.model
+    def _get_write_changes(self, records, vals):
+        """Return the old and new values of the fields of `vals` which
+        change each record, as dictionaries {RES_ID: {'FIELD': VALUE, ...}}
+        without the records left unchanged. The old values are in the
+        format of `vals`, or `False` when they are not compared.
+
+        The values are compared to the cached ones, fetched for all the
+        records at once if needed. Only many2many values replacing the
+        whole set of records are compared among x2many values, binary values
+        are never compared.
+        """
+        m2m_sets = {}
+        compared = set()
+        for fname, value in vals.items():
+            field = records._fields.get(fname)
+            if not field or not field.store or field.type in ("binary", "one2many"):
+                continue
+            if field.type == "many2many":
+                commands = value if isinstance(value, (list, tuple)) else []
+                if len(commands) == 1 and len(commands[0]) == 3 and commands[0][0] == 6:
+                    m2m_sets[fname] = set(commands[0][2] or [])
+                    compared.add(fname)
+                continue
+            compared.add(fname)
+        old_values = {}
+        new_values = {}
+        cache = records.env.cache
+        for record in records.sudo():
+            old_vals = {}
+            new_vals = {}
+            for fname, value in vals.items():
+                old_value = False
+                if fname in compared:
+                    field = record._fields[fname]
+                    # Fetch the value, with the prefetching of the records
+                    current = record[fname]
+                    if fname in m2m_sets:
+                        unchanged = set(current.ids) == m2m_sets[fname]
+                    else:
+                        try:
+                            cache_value = field.convert_to_cache(value, record)
+                            unchanged = cache_value == cache.get(record, field)
+                        except (TypeError, ValueError):
+                            unchanged = False
+                    if unchanged:
+                        continue
+                    old_value = field.convert_to_write(current, record)
+                old_vals[fname] = old_value
+                new_vals[fname] = value
+            if new_vals:
+                old_values[record.id] = old_vals
+                new_values[record.id] = new_vals
+        return old_values, new_values
+
+    @api.model
+    def _snapshot_vals_list(self, model, vals_list):
+        """Return a copy of the audited values of `vals_list`, made before
+        the creation which can alter them. The scalar values are shared (they
+        are immutable), the values of the x2many commands are copied the
+        same way, and binary values are replaced by their size and hash."""
+        audited_fields = set(self.get_auditlog_fields(model))
+        return [self._snapshot_vals(model, vals, audited_fields) for vals in vals_list]
+
+    @api.model
+    def _snapshot_vals(self, model, vals, audited_fields=None):
+        snapshot = {}
+        for fname, value in vals.items():
+            field = model._fields.get(fname)
+            if not field or (
+                audited_fields is not None and fname not in audited_fields
+            ):
+                continue
+            if field.type == "binary":
+                value = self._summarize_binary(value)
+            elif field.type in ("one2many", "many2many") and isinstance(
+                value, (list, tuple)
+            ):
+                comodel = self.env[field.comodel_name]
+                value = [self._snapshot_command(comodel, command) for command in value]
+            snapshot[fname] = value
+        return snapshot
+
+    @api.model
+    def _snapshot_command(self, comodel, command):
+        if not isinstance(command, (list, tuple)) or len(command) != 3:
+            return command
+        if isinstance(command[2], dict):
+            return (command[0], command[1], self._snapshot_vals(comodel, command[2]))
+        if isinstance(command[2], (list, tuple)):
+            return (command[0], command[1], list(command[2]))
+        return tuple(command)
+
+    @api.model
+    def _summarize_binary(self, value):
+        """Return the size and SHA-1 hash of a binary value (as given, i.e.
+        usually base64-encoded) instead of the value itself."""
+        if not value:
+            return value
+        if isinstance(value, str):
+            value = value.encode()
+        return "<binary: %s bytes, sha1 %s>" % (
+            len(value),
+            hashlib.sha1(value).hexdigest(),
+        )
+
     def _make_create(self):
         """Instanciate a create method that log its calls."""
         self.ensure_one()
         log_type = self.log_type
-        users_to_exclude = self.mapped("users_to_exclude_ids")
+        snapshot_mode = self.snapshot_mode
 
         @api.model_create_multi
         @api.returns("self", lambda value: value.id)
@@ -277,13 +744,15 @@ class AuditlogRule(models.Model):
             self = self.with_context(auditlog_disabled=True)
             rule_model = self.env["auditlog.rule"]
             new_records = create_full.origin(self, vals_list, **kwargs)
+            import_sample_size = rule_model._get_import_sample_size(self._name)
+            logged_records = new_records[:import_sample_size]
             # Take a snapshot of record values from the cache instead of using
             # 'read()'. It avoids issues with related/computed fields which
             # stored in the database only at the end of the transaction, but
             # their values exist in cache.
             new_values = {}
             fields_list = rule_model.get_auditlog_fields(self)
-            for new_record in new_records.sudo():
+            for new_record in logged_records.sudo():
                 new_values.setdefault(new_record.id, {})
                 for fname, field in new_record._fields.items():
                     if fname not in fields_list:
@@ -291,12 +760,16 @@ class AuditlogRule(models.Model):
                     new_values[new_record.id][fname] = field.convert_to_read(
                         new_record[fname], new_record
                     )
-            if self.env.user in users_to_exclude:
+            if rule_model._is_user_excluded(self._name):
                 return new_records
+            if import_sample_size is not None:
+                rule_model.sudo()._log_import_summary(
+                    self.env.uid, self._name, new_records.ids, log_type
+                )
             rule_model.sudo().create_logs(
                 self.env.uid,
                 self._name,
-                new_records.ids,
+                logged_records.ids,
                 "create",
                 None,
                 new_values,
@@ -309,17 +782,26 @@ class AuditlogRule(models.Model):
         def create_fast(self, vals_list, **kwargs):
             self = self.with_context(auditlog_disabled=True)
             rule_model = self.env["auditlog.rule"]
-            vals_list2 = copy.deepcopy(vals_list)
+            import_sample_size = rule_model._get_import_sample_size(self._name)
+            logged_vals_list = vals_list[:import_sample_size]
+            if snapshot_mode == "shallow":
+                vals_list2 = rule_model._snapshot_vals_list(self, logged_vals_list)
+            else:
+                vals_list2 = copy.deepcopy(logged_vals_list)
             new_records = create_fast.origin(self, vals_list, **kwargs)
             new_values = {}
             for vals, new_record in zip(vals_list2, new_records):
                 new_values.setdefault(new_record.id, vals)
-            if self.env.user in users_to_exclude:
+            if rule_model._is_user_excluded(self._name):
                 return new_records
+            if import_sample_size is not None:
+                rule_model.sudo()._log_import_summary(
+                    self.env.uid, self._name, new_records.ids, log_type
+                )
             rule_model.sudo().create_logs(
                 self.env.uid,
                 self._name,
-                new_records.ids,
+                list(new_values),
                 "create",
                 None,
                 new_values,
@@ -327,13 +809,39 @@ class AuditlogRule(models.Model):
             )
             return new_records
 
-        return create_full if self.log_type == "full" else create_fast
+        return create_full if self.log_type in DIFF_LOG_TYPES else create_fast
+
+    def _make_load(self):
+        """Instanciate a load method flagging the records it creates as
+        imported, see `_get_import_sample_size()`.
+
+        `load()` rolls back its savepoints without clearing the cache, so the
+        logs of the HTTP request and session are created before them. The
+        savepoint of a test import of `base_import` includes them though,
+        their memoized ids are checked again after the import.
+        """
+        self.ensure_one()
+
+        def load(self, fields, data):
+            self = self.with_context(auditlog_import=True)
+            http_request_model = self.env["auditlog.http.request"].sudo()
+            http_session_model = self.env["auditlog.http.session"].sudo()
+            http_request_model.current_http_request()
+            http_session_model.current_http_session()
+            try:
+                return load.origin(self, fields, data)
+            finally:
+                if self.env.context.get("import_file"):
+                    http_request_model.invalidate_cache(["name"])
+                    http_session_model.invalidate_cache(["name"])
+
+        return load
 
     def _make_read(self):
         """Instanciate a read method that log its calls."""
         self.ensure_one()
         log_type = self.log_type
-        users_to_exclude = self.mapped("users_to_exclude_ids")
+        log_read_mode = self.log_read_mode
 
         def read(self, fields=None, load="_classic_read", **kwargs):
             result = read.origin(self, fields, load, **kwargs)
@@ -353,7 +861,12 @@ class AuditlogRule(models.Model):
                 return result
             self = self.with_context(auditlog_disabled=True)
             rule_model = self.env["auditlog.rule"]
-            if self.env.user in users_to_exclude:
+            if rule_model._is_user_excluded(self._name):
+                return result
+            if not self.ids or not rule_model._is_read_logged(self._name):
+                return result
+            if log_read_mode == "ids":
+                rule_model.sudo()._log_read_access(self.env.uid, self._name, self.ids)
                 return result
             rule_model.sudo().create_logs(
                 self.env.uid,
@@ -372,7 +885,6 @@ class AuditlogRule(models.Model):
         """Instanciate a write method that log its calls."""
         self.ensure_one()
         log_type = self.log_type
-        users_to_exclude = self.mapped("users_to_exclude_ids")
 
         def write_full(self, vals, **kwargs):
             self = self.with_context(auditlog_disabled=True)
@@ -391,7 +903,7 @@ class AuditlogRule(models.Model):
                 .with_context(prefetch_fields=False)
                 .read(fields_list)
             }
-            if self.env.user in users_to_exclude:
+            if rule_model._is_user_excluded(self._name):
                 return result
             rule_model.sudo().create_logs(
                 self.env.uid,
@@ -409,13 +921,37 @@ class AuditlogRule(models.Model):
             rule_model = self.env["auditlog.rule"]
             # Log the user input only, no matter if the `vals` is updated
             # afterwards as it could not represent the real state
-            # of the data in the database
-            vals2 = dict(vals)
-            old_vals2 = dict.fromkeys(list(vals2.keys()), False)
-            old_values = {id_: old_vals2 for id_ in self.ids}
-            new_values = {id_: vals2 for id_ in self.ids}
+            # of the data in the database. The values which do not change
+            # the records are left out.
+            old_values, new_values = rule_model._get_write_changes(self, vals)
             result = write_fast.origin(self, vals, **kwargs)
-            if self.env.user in users_to_exclude:
+            if rule_model._is_user_excluded(self._name) or not new_values:
+                return result
+            rule_model.sudo().create_logs(
+                self.env.uid,
+                self._name,
+                [id_ for id_ in self.ids if id_ in new_values],
+                "write",
+                old_values,
+                new_values,
+                {"log_type": log_type},
+            )
+            return result
+
+        def write_smart(self, vals, **kwargs):
+            self = self.with_context(auditlog_disabled=True)
+            rule_model = self.env["auditlog.rule"]
+            fields_list = rule_model.get_auditlog_write_fields(self, vals)
+            # Reading no field would read all of them
+            records = self.sudo().with_context(prefetch_fields=False)
+            old_values = {}
+            if fields_list:
+                old_values = {d["id"]: d for d in records.read(fields_list)}
+            result = write_smart.origin(self, vals, **kwargs)
+            new_values = {}
+            if fields_list:
+                new_values = {d["id"]: d for d in records.read(fields_list)}
+            if rule_model._is_user_excluded(self._name):
                 return result
             rule_model.sudo().create_logs(
                 self.env.uid,
@@ -428,13 +964,16 @@ class AuditlogRule(models.Model):
             )
             return result
 
-        return write_full if self.log_type == "full" else write_fast
+        if self.log_type == "full":
+            return write_full
+        if self.log_type == "smart":
+            return write_smart
+        return write_fast
 
     def _make_unlink(self):
         """Instanciate an unlink method that log its calls."""
         self.ensure_one()
         log_type = self.log_type
-        users_to_exclude = self.mapped("users_to_exclude_ids")
 
         def unlink_full(self, **kwargs):
             self = self.with_context(auditlog_disabled=True)
@@ -446,7 +985,7 @@ class AuditlogRule(models.Model):
                 .with_context(prefetch_fields=False)
                 .read(fields_list)
             }
-            if self.env.user in users_to_exclude:
+            if rule_model._is_user_excluded(self._name):
                 return unlink_full.origin(self, **kwargs)
             rule_model.sudo().create_logs(
                 self.env.uid,
@@ -462,7 +1001,7 @@ class AuditlogRule(models.Model):
         def unlink_fast(self, **kwargs):
             self = self.with_context(auditlog_disabled=True)
             rule_model = self.env["auditlog.rule"]
-            if self.env.user in users_to_exclude:
+            if rule_model._is_user_excluded(self._name):
                 return unlink_fast.origin(self, **kwargs)
             rule_model.sudo().create_logs(
                 self.env.uid,
@@ -475,7 +1014,7 @@ class AuditlogRule(models.Model):
             )
             return unlink_fast.origin(self, **kwargs)
 
-        return unlink_full if self.log_type == "full" else unlink_fast
+        return unlink_full if self.log_type in DIFF_LOG_TYPES else unlink_fast
 
     def create_logs(
         self,
@@ -486,201 +1025,418 @@ class AuditlogRule(models.Model):
         old_values=None,
         new_values=None,
         additional_log_values=None,
+        res_names=None,
     ):
         """Create logs. `old_values` and `new_values` are dictionaries, e.g:
         {RES_ID: {'FIELD': VALUE, ...}}
+        `res_names` can provide the name of records which do not exist
+        anymore, e.g: {RES_ID: NAME}
+
+        The values of all the logs are prepared first and inserted with a
+        single `create()`, then the same is done for all their lines.
         """
         if old_values is None:
             old_values = EMPTY_DICT
         if new_values is None:
             new_values = EMPTY_DICT
+        context = self.env.context
+        if (
+            method == "write"
+            and not context.get("auditlog_flush")
+            and not context.get("auditlog_coalesced")
+        ):
+            rule_config = self._get_rule_config(res_model)
+            if rule_config and rule_config.coalesce_writes:
+                return self._coalesce_writes(
+                    uid,
+                    res_model,
+                    res_ids,
+                    old_values,
+                    new_values,
+                    additional_log_values,
+                )
+        log_type = (additional_log_values or EMPTY_DICT).get("log_type")
+        if log_type == "deferred" and not context.get("auditlog_flush"):
+            return self._defer_logs(
+                uid,
+                res_model,
+                res_ids,
+                method,
+                old_values,
+                new_values,
+                additional_log_values,
+            )
         log_model = self.env["auditlog.log"]
+        log_line_model = self.env["auditlog.log.line"]
         http_request_model = self.env["auditlog.http.request"]
         http_session_model = self.env["auditlog.http.session"]
         model_model = self.env[res_model]
         model_id = self.pool._auditlog_model_cache[res_model]
-        auditlog_rule = self.env["auditlog.rule"].search([("model_id", "=", model_id)])
-        fields_to_exclude = auditlog_rule.fields_to_exclude_ids.mapped("name")
+        rule_config = self._get_rule_config(res_model)
+        excluded_fields = (
+            rule_config.excluded_fields if rule_config else FIELDS_BLACKLIST_SET
+        )
+        http_request_id = http_request_model.current_http_request()
+        http_session_id = http_session_model.current_http_session()
+        if method == "write":
+            # No log for the records without any logged change
+            res_ids = [
+                res_id
+                for res_id in res_ids
+                if DictDiffer(
+                    new_values.get(res_id, EMPTY_DICT),
+                    old_values.get(res_id, EMPTY_DICT),
+                ).changed()
+                - excluded_fields
+            ]
+            if not res_ids:
+                return log_model
+        res_names = self._get_res_names(model_model, res_ids, res_names)
+        vals_list = []
         for res_id in res_ids:
-            name = model_model.browse(res_id).name_get()
-            res_name = name and name[0] and name[0][1]
             vals = {
-                "name": res_name,
+                "name": res_names.get(res_id, False),
                 "model_id": model_id,
                 "res_id": res_id,
                 "method": method,
                 "user_id": uid,
-                "http_request_id": http_request_model.current_http_request(),
-                "http_session_id": http_session_model.current_http_session(),
+                "http_request_id": http_request_id,
+                "http_session_id": http_session_id,
             }
             vals.update(additional_log_values or {})
-            log = log_model.create(vals)
+            vals_list.append(vals)
+        logs = log_model.create(vals_list)
+        # The fields to log, filtered once per batch for each set of fields
+        model = self.env["ir.model"].browse(model_id)
+        logged_fields = {}
+
+        def get_logged_fields(field_names):
+            key = frozenset(field_names)
+            if key not in logged_fields:
+                logged_fields[key] = self._get_logged_fields(
+                    model, key, excluded_fields
+                )
+            return logged_fields[key]
+
+        lines_vals = []
+        for log in logs:
+            res_id = log.res_id
             diff = DictDiffer(
                 new_values.get(res_id, EMPTY_DICT), old_values.get(res_id, EMPTY_DICT)
             )
             if method == "create":
-                self._create_log_line_on_create(
-                    log, diff.added(), new_values, fields_to_exclude
+                lines_vals += self._prepare_log_lines_on_create(
+                    log, get_logged_fields(diff.added()), new_values
                 )
             elif method == "read":
-                self._create_log_line_on_read(
+                lines_vals += self._prepare_log_lines_on_read(
                     log,
-                    list(old_values.get(res_id, EMPTY_DICT).keys()),
+                    get_logged_fields(old_values.get(res_id, EMPTY_DICT)),
                     old_values,
-                    fields_to_exclude,
                 )
             elif method == "write":
-                self._create_log_line_on_write(
-                    log, diff.changed(), old_values, new_values, fields_to_exclude
+                lines_vals += self._prepare_log_lines_on_write(
+                    log, get_logged_fields(diff.changed()), old_values, new_values
                 )
-            elif method == "unlink" and auditlog_rule.capture_record:
-                self._create_log_line_on_read(
+            elif method == "unlink" and rule_config and rule_config.capture_record:
+                lines_vals += self._prepare_log_lines_on_read(
                     log,
-                    list(old_values.get(res_id, EMPTY_DICT).keys()),
+                    get_logged_fields(old_values.get(res_id, EMPTY_DICT)),
                     old_values,
-                    fields_to_exclude,
                 )
+        self._resolve_pending_names(lines_vals)
+        log_line_model.create(lines_vals)
+        return logs
 
-    def _get_field(self, model, field_name):
-        cache = self.pool._auditlog_field_cache
-        if field_name not in cache.get(model.model, {}):
-            cache.setdefault(model.model, {})
-            # - we use 'search()' then 'read()' instead of the 'search_read()'
-            #   to take advantage of the 'classic_write' loading
-            # - search the field in the current model and those it inherits
-            field_model = self.env["ir.model.fields"].sudo()
-            all_model_ids = [model.id]
-            all_model_ids.extend(model.inherited_model_ids.ids)
-            field = field_model.search(
-                [("model_id", "in", all_model_ids), ("name", "=", field_name)]
+    @api.model
+    def _get_res_names(self, model, res_ids, res_names=None):
+        """Return the names of the records as a dictionary {RES_ID: NAME},
+        computed with a single `name_get()`. The names given in `res_names`
+        are kept, records which do not exist anymore are ignored.
+        """
+        names = dict(res_names or EMPTY_DICT)
+        missing_ids = [res_id for res_id in res_ids if res_id not in names]
+        if missing_ids:
+            names.update(model.browse(missing_ids).exists().name_get())
+        return names
+
+    @api.model
+    def _resolve_pending_names(self, lines_vals):
+        """Replace the `PendingNames` placeholders of the values of log lines
+        by the names of the records, with one existence check and one
+        `name_get()` per related model. Deleted records have a 'DELETED' text
+        representation.
+        """
+        text_keys = ("old_value_text", "new_value_text")
+        ids_by_relation = defaultdict(set)
+        for vals in lines_vals:
+            for key in text_keys:
+                if isinstance(vals[key], PendingNames):
+                    ids_by_relation[vals[key].relation].update(vals[key].ids)
+        if not ids_by_relation:
+            return
+        names = {}
+        for relation, ids in ids_by_relation.items():
+            records = self.env[relation].browse(list(ids)).exists()
+            names[relation] = dict(records.name_get())
+        for vals in lines_vals:
+            for key in text_keys:
+                pending = vals[key]
+                if isinstance(pending, PendingNames):
+                    relation_names = names[pending.relation]
+                    vals[key] = [
+                        (id_, relation_names.get(id_, "DELETED")) for id_ in pending.ids
+                    ]
+
+    def _defer_logs(
+        self, uid, res_model, res_ids, method, old_values, new_values, log_values
+    ):
+        """Store the logs of a 'deferred' rule in the queue, processed later
+        by a scheduled action. The entry is inserted in the transaction of the
+        logged operation, so it is rolled back with it, savepoints included.
+        """
+        res_names = {}
+        if method == "unlink":
+            # The records will not exist anymore when the queue is processed
+            res_names = dict(self.env[res_model].browse(res_ids).name_get())
+        data = {
+            "res_ids": list(res_ids),
+            "old_values": {
+                res_id: old_values[res_id] for res_id in res_ids if res_id in old_values
+            },
+            "new_values": {
+                res_id: new_values[res_id] for res_id in res_ids if res_id in new_values
+            },
+            "log_values": log_values,
+            "res_names": res_names,
+        }
+        http_request_model = self.env["auditlog.http.request"]
+        http_session_model = self.env["auditlog.http.session"]
+        self.env["auditlog.log.queue"].sudo().create(
+            {
+                "model_id": self.pool._auditlog_model_cache[res_model],
+                "res_model": res_model,
+                "method": method,
+                "user_id": uid,
+                "http_request_id": http_request_model.current_http_request(),
+                "http_session_id": http_session_model.current_http_session(),
+                "data": json.dumps(data, default=str),
+            }
+        )
+        return self.env["auditlog.log"]
+
+    def _stage_entry(self, key, flush, vals):
+        """Insert a queue entry staging data of the current transaction,
+        processed by ``flush`` right before the commit. Unlike a buffer in
+        memory, the entry is rolled back with the operation it describes,
+        savepoints included."""
+        precommit = self.env.cr.precommit
+        if key not in precommit.data:
+            precommit.data[key] = []
+            precommit.add(flush)
+        entry = self.env["auditlog.log.queue"].sudo().create(vals)
+        precommit.data[key].append(entry.id)
+
+    def _pop_staged_entries(self, key):
+        """Return the entries staged under ``key`` which were not rolled
+        back, in their creation order."""
+        entry_ids = self.env.cr.precommit.data.pop(key, [])
+        return self.env["auditlog.log.queue"].sudo().browse(entry_ids).exists()
+
+    def _coalesce_writes(
+        self, uid, res_model, res_ids, old_values, new_values, log_values
+    ):
+        """Stage the writes of a rule coalescing them. For each record, the
+        logs created right before the commit keep the first old value and
+        the last new value of each field.
+        """
+        data = {
+            "res_ids": list(res_ids),
+            "old_values": {
+                res_id: old_values[res_id] for res_id in res_ids if res_id in old_values
+            },
+            "new_values": {
+                res_id: new_values[res_id] for res_id in res_ids if res_id in new_values
+            },
+            "log_values": log_values,
+        }
+        http_request_model = self.env["auditlog.http.request"]
+        http_session_model = self.env["auditlog.http.session"]
+        self._stage_entry(
+            COALESCED_WRITES_KEY,
+            self._flush_coalesced_writes,
+            {
+                "kind": "coalesced",
+                "model_id": self.pool._auditlog_model_cache[res_model],
+                "res_model": res_model,
+                "method": "write",
+                "user_id": uid,
+                "http_request_id": http_request_model.current_http_request(),
+                "http_session_id": http_session_model.current_http_session(),
+                "data": json.dumps(data, default=str),
+            },
+        )
+        return self.env["auditlog.log"]
+
+    def _flush_coalesced_writes(self):
+        """Create the logs of the writes coalesced in the transaction, one
+        batch per user, model and HTTP request."""
+        entries = self._pop_staged_entries(COALESCED_WRITES_KEY)
+        coalesced = {}
+        for entry in entries:
+            data = json.loads(entry.data)
+            key = (
+                entry.user_id.id,
+                entry.res_model,
+                entry.http_request_id.id,
+                entry.http_session_id.id,
+                tuple(sorted((data["log_values"] or EMPTY_DICT).items())),
+            )
+            writes = coalesced.setdefault(key, {})
+            old_values = _int_keys(data["old_values"])
+            new_values = _int_keys(data["new_values"])
+            for res_id in data["res_ids"]:
+                old_vals, new_vals = writes.setdefault(res_id, ({}, {}))
+                for fname, value in old_values.get(res_id, EMPTY_DICT).items():
+                    old_vals.setdefault(fname, value)
+                new_vals.update(new_values.get(res_id, EMPTY_DICT))
+        entries.unlink()
+        rule_model = self.with_context(auditlog_coalesced=True)
+        for key, writes in coalesced.items():
+            uid, res_model, http_request_id, http_session_id, log_values = key
+            log_values = dict(
+                log_values,
+                http_request_id=http_request_id,
+                http_session_id=http_session_id,
+            )
+            rule_model.create_logs(
+                uid,
+                res_model,
+                list(writes),
+                "write",
+                {res_id: vals[0] for res_id, vals in writes.items()},
+                {res_id: vals[1] for res_id, vals in writes.items()},
+                log_values,
             )
+
+    @api.model
+    def _load_field_cache(self, model_name):
+        """Load the fields of the model and of the models it inherits in the
+        registry cache as `FieldInfo` tuples, with a single query. Return the
+        cached fields as a dictionary {FIELD_NAME: FIELD_INFO}.
+        """
+        model_names = [model_name] + list(self.env[model_name]._inherits)
+        self.env.cr.execute(
+            """SELECT id, name, relation, ttype, model FROM ir_model_fields
+            WHERE model IN %s""",
+            (tuple(model_names),),
+        )
+        fields_info = {}
+        for id_, name, relation, ttype, model in self.env.cr.fetchall():
+            # The fields of the model itself take precedence
+            if model == model_name or name not in fields_info:
+                fields_info[name] = FieldInfo(id_, name, relation, ttype)
+        self.pool._auditlog_field_cache[model_name] = fields_info
+        return fields_info
+
+    def _get_field(self, model, field_name):
+        """Return the `FieldInfo` of a field of the model (an `ir.model`
+        record), or `False` if the field has no `ir.model.fields` record."""
+        fields_info = self.pool._auditlog_field_cache.get(model.model)
+        if fields_info is None or field_name not in fields_info:
+            # The field may have been created since the cache was loaded
+            fields_info = self._load_field_cache(model.model)
             # The field can be a dummy one, like 'in_group_X' on 'res.users'
             # As such we can't log it (field_id is required to create a log)
-            if not field:
-                cache[model.model][field_name] = False
-            else:
-                field_data = field.read(load="_classic_write")[0]
-                cache[model.model][field_name] = field_data
-        return cache[model.model][field_name]
+            fields_info.setdefault(field_name, False)
+        return fields_info[field_name]
 
-    def _create_log_line_on_read(
-        self, log, fields_list, read_values, fields_to_exclude
-    ):
-        """Log field filled on a 'read' operation."""
-        log_line_model = self.env["auditlog.log.line"]
-        fields_to_exclude = fields_to_exclude + FIELDS_BLACKLIST
-        for field_name in fields_list:
-            if field_name in fields_to_exclude:
+    @api.model
+    def _get_logged_fields(self, model, field_names, excluded_fields):
+        """Return the `FieldInfo` of the fields of `field_names` to log, i.e.
+        those which are not excluded and have an `ir.model.fields` record
+        (not all fields have one, ie. related fields)."""
+        logged_fields = []
+        for field_name in field_names:
+            if field_name in excluded_fields:
                 continue
-            field = self._get_field(log.model_id, field_name)
-            # not all fields have an ir.models.field entry (ie. related fields)
+            field = self._get_field(model, field_name)
             if field:
-                log_vals = self._prepare_log_line_vals_on_read(log, field, read_values)
-                log_line_model.create(log_vals)
+                logged_fields.append(field)
+        return logged_fields
+
+    def _prepare_log_lines_on_read(self, log, fields, read_values):
+        """Prepare the values of the lines logging the `fields` filled on a
+        'read' operation."""
+        return [
+            self._prepare_log_line_vals_on_read(log, field, read_values)
+            for field in fields
+        ]
 
     def _prepare_log_line_vals_on_read(self, log, field, read_values):
         """Prepare the dictionary of values used to create a log line on a
         'read' operation.
         """
         vals = {
-            "field_id": field["id"],
+            "field_id": field.id,
             "log_id": log.id,
-            "old_value": read_values[log.res_id][field["name"]],
-            "old_value_text": read_values[log.res_id][field["name"]],
+            "old_value": read_values[log.res_id][field.name],
+            "old_value_text": read_values[log.res_id][field.name],
             "new_value": False,
             "new_value_text": False,
         }
-        if field["relation"] and "2many" in field["ttype"]:
-            old_value_text = (
-                self.env[field["relation"]].browse(vals["old_value"]).name_get()
-            )
-            vals["old_value_text"] = old_value_text
+        if field.relation and "2many" in field.ttype:
+            vals["old_value_text"] = PendingNames(field.relation, vals["old_value"])
         return vals
 
-    def _create_log_line_on_write(
-        self, log, fields_list, old_values, new_values, fields_to_exclude
-    ):
-        """Log field updated on a 'write' operation."""
-        log_line_model = self.env["auditlog.log.line"]
-        fields_to_exclude = fields_to_exclude + FIELDS_BLACKLIST
-        for field_name in fields_list:
-            if field_name in fields_to_exclude:
-                continue
-            field = self._get_field(log.model_id, field_name)
-            # not all fields have an ir.models.field entry (ie. related fields)
-            if field:
-                log_vals = self._prepare_log_line_vals_on_write(
-                    log, field, old_values, new_values
-                )
-                log_line_model.create(log_vals)
+    def _prepare_log_lines_on_write(self, log, fields, old_values, new_values):
+        """Prepare the values of the lines logging the `fields` updated on a
+        'write' operation."""
+        return [
+            self._prepare_log_line_vals_on_write(log, field, old_values, new_values)
+            for field in fields
+        ]
 
     def _prepare_log_line_vals_on_write(self, log, field, old_values, new_values):
         """Prepare the dictionary of values used to create a log line on a
         'write' operation.
         """
         vals = {
-            "field_id": field["id"],
+            "field_id": field.id,
             "log_id": log.id,
-            "old_value": old_values[log.res_id][field["name"]],
-            "old_value_text": old_values[log.res_id][field["name"]],
-            "new_value": new_values[log.res_id][field["name"]],
-            "new_value_text": new_values[log.res_id][field["name"]],
+            "old_value": old_values[log.res_id][field.name],
+            "old_value_text": old_values[log.res_id][field.name],
+            "new_value": new_values[log.res_id][field.name],
+            "new_value_text": new_values[log.res_id][field.name],
         }
-        # for *2many fields, log the name_get
-        if log.log_type == "full" and field["relation"] and "2many" in field["ttype"]:
-            # Filter IDs to prevent a 'name_get()' call on deleted resources
-            existing_ids = self.env[field["relation"]]._search(
-                [("id", "in", vals["old_value"])]
-            )
-            old_value_text = []
-            if existing_ids:
-                existing_values = (
-                    self.env[field["relation"]].browse(existing_ids).name_get()
-                )
-                old_value_text.extend(existing_values)
-            # Deleted resources will have a 'DELETED' text representation
-            deleted_ids = set(vals["old_value"]) - set(existing_ids)
-            for deleted_id in deleted_ids:
-                old_value_text.append((deleted_id, "DELETED"))
-            vals["old_value_text"] = old_value_text
-            new_value_text = (
-                self.env[field["relation"]].browse(vals["new_value"]).name_get()
-            )
-            vals["new_value_text"] = new_value_text
+        # for *2many fields, log the name_get (resolved for the whole batch)
+        if log.log_type in DIFF_LOG_TYPES and field.relation and "2many" in field.ttype:
+            vals["old_value_text"] = PendingNames(field.relation, vals["old_value"])
+            vals["new_value_text"] = PendingNames(field.relation, vals["new_value"])
         return vals
 
-    def _create_log_line_on_create(
-        self, log, fields_list, new_values, fields_to_exclude
-    ):
-        """Log field filled on a 'create' operation."""
-        log_line_model = self.env["auditlog.log.line"]
-        fields_to_exclude = fields_to_exclude + FIELDS_BLACKLIST
-        for field_name in fields_list:
-            if field_name in fields_to_exclude:
-                continue
-            field = self._get_field(log.model_id, field_name)
-            # not all fields have an ir.models.field entry (ie. related fields)
-            if field:
-                log_vals = self._prepare_log_line_vals_on_create(log, field, new_values)
-                log_line_model.create(log_vals)
+    def _prepare_log_lines_on_create(self, log, fields, new_values):
+        """Prepare the values of the lines logging the `fields` filled on a
+        'create' operation."""
+        return [
+            self._prepare_log_line_vals_on_create(log, field, new_values)
+            for field in fields
+        ]
 
     def _prepare_log_line_vals_on_create(self, log, field, new_values):
         """Prepare the dictionary of values used to create a log line on a
         'create' operation.
         """
         vals = {
-            "field_id": field["id"],
+            "field_id": field.id,
             "log_id": log.id,
             "old_value": False,
             "old_value_text": False,
-            "new_value": new_values[log.res_id][field["name"]],
-            "new_value_text": new_values[log.res_id][field["name"]],
+            "new_value": new_values[log.res_id][field.name],
+            "new_value_text": new_values[log.res_id][field.name],
         }
-        if log.log_type == "full" and field["relation"] and "2many" in field["ttype"]:
-            new_value_text = (
-                self.env[field["relation"]].browse(vals["new_value"]).name_get()
-            )
-            vals["new_value_text"] = new_value_text
+        if log.log_type in DIFF_LOG_TYPES and field.relation and "2many" in field.ttype:
+            vals["new_value_text"] = PendingNames(field.relation, vals["new_value"])
         return vals
 
     def subscribe(self):
@@ -690,8 +1446,9 @@ class AuditlogRule(models.Model):
         act_window_model = self.env["ir.actions.act_window"]
         for rule in self:
             # Create a shortcut to view logs
-            domain = "[('model_id', '=', %s), ('res_id', '=', active_id)]" % (
-                rule.model_id.id
+            domain = (
+                "[('model_id', '=', %s), '|', ('res_id', '=', active_id), "
+                "('accessed_res_id', '=', active_id)]" % rule.model_id.id
             )
             vals = {
                 "name": _("View logs"),
@@ -2,11 +2,36 @@
 # © 2018 Pieter Paulussen <pieter_paulussen@me.com>
 # © 2021 Stefan Rijnhart <stefan@opener.amsterdam>
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import base64
+import hashlib
+from types import SimpleNamespace
+from unittest import mock
+
+from odoo import tools
+from odoo.exceptions import UserError
 from odoo.tests.common import Form, TransactionCase
 
 from odoo.addons.base.models.ir_model import MODULE_UNINSTALL_FLAG
 
 
+def fake_http_request(env, path="/web/dataset/call_kw"):
+    """Patch the HTTP request seen by the logs of HTTP requests and
+    sessions."""
+    request = mock.MagicMock(
+        uid=env.uid,
+        context={},
+        httprequest=SimpleNamespace(path=path, url_root="http://localhost/"),
+        session=mock.MagicMock(sid="auditlog-test-session"),
+    )
+    patch_request = mock.patch(
+        "odoo.addons.auditlog.models.http_request.request", request
+    )
+    patch_session = mock.patch(
+        "odoo.addons.auditlog.models.http_session.request", request
+    )
+    return patch_request, patch_session
+
+
 class AuditlogCommon(object):
     def test_LogCreation(self):
         """First test, caching some data."""
@@ -214,6 +239,273 @@ class TestAuditlogFull(TransactionCase, AuditlogCommon):
         self.groups_rule.unlink()
         super(TestAuditlogFull, self).tearDown()
 
+    def test_rule_config_cache(self):
+        rule_model = self.env["auditlog.rule"]
+        config = rule_model._get_rule_config("res.groups")
+        self.assertEqual(config.id, self.groups_rule.id)
+        self.assertFalse(config.fields_to_exclude)
+        # Served from the cache
+        with self.assertQueryCount(0):
+            rule_model._get_rule_config("res.groups")
+        comment_field = self.env["ir.model.fields"]._get("res.groups", "comment")
+        self.groups_rule.write({"fields_to_exclude_ids": [(4, comment_field.id)]})
+        config = rule_model._get_rule_config("res.groups")
+        self.assertEqual(config.fields_to_exclude, {"comment"})
+        self.assertTrue({"comment", "create_date"} <= config.excluded_fields)
+
+    def test_http_logs_memoized(self):
+        """The logs of the HTTP request and session are created by the first
+        log of the request, the next ones do not look them up."""
+        self.groups_rule.subscribe()
+        rule_model = self.env["auditlog.rule"].sudo()
+        group = self.env["res.groups"].create({"name": "testgroup http"})
+        queries = []
+        execute = self.env.cr.execute
+
+        def execute_logged(query, *args, **kwargs):
+            queries.append(str(query))
+            return execute(query, *args, **kwargs)
+
+        patch_request, patch_session = fake_http_request(self.env)
+        with patch_request, patch_session:
+            logs = rule_model.create_logs(
+                self.env.uid,
+                "res.groups",
+                group.ids,
+                "write",
+                {group.id: {"name": "testgroup http"}},
+                {group.id: {"name": "testgroup http 2"}},
+            )
+            with mock.patch.object(self.env.cr, "execute", execute_logged):
+                for i in range(2, 5):
+                    logs |= rule_model.create_logs(
+                        self.env.uid,
+                        "res.groups",
+                        group.ids,
+                        "write",
+                        {group.id: {"name": "testgroup http %s" % i}},
+                        {group.id: {"name": "testgroup http %s" % (i + 1)}},
+                    )
+        self.assertEqual(len(logs), 4)
+        self.assertEqual(len(logs.http_request_id), 1)
+        self.assertEqual(len(logs.http_session_id), 1)
+        self.assertTrue(queries)
+        self.assertFalse([query for query in queries if "auditlog_http" in query])
+
+    def test_http_logs_savepoint(self):
+        """The logs of the HTTP request and session rolled back to a
+        savepoint are created again."""
+        http_request_model = self.env["auditlog.http.request"].sudo()
+        http_session_model = self.env["auditlog.http.session"].sudo()
+        patch_request, patch_session = fake_http_request(self.env)
+        with patch_request, patch_session:
+            with self.assertRaises(UserError):
+                with self.env.cr.savepoint():
+                    http_request_model.current_http_request()
+                    http_session_model.current_http_session()
+                    raise UserError("Rolled back")
+            http_request = http_request_model.browse(
+                http_request_model.current_http_request()
+            )
+            http_session = http_session_model.browse(
+                http_session_model.current_http_session()
+            )
+            self.assertTrue(http_request.exists())
+            self.assertTrue(http_session.exists())
+            self.assertEqual(http_request.http_session_id, http_session)
+            # Memoized
+            with self.assertQueryCount(0):
+                http_request_model.current_http_request()
+                http_session_model.current_http_session()
+
+    def test_field_cache(self):
+        """The fields of the subscribed models are loaded at once."""
+        self.groups_rule.subscribe()
+        rule_model = self.env["auditlog.rule"]
+        groups_model = self.env["ir.model"].browse(self.groups_model_id)
+        self.assertEqual(groups_model.model, "res.groups")
+        fields_info = self.env.registry._auditlog_field_cache["res.groups"]
+        name_field = self.env["ir.model.fields"]._get("res.groups", "name")
+        self.assertEqual(fields_info["name"].id, name_field.id)
+        self.assertEqual(fields_info["users"].relation, "res.users")
+        with self.assertQueryCount(0):
+            self.assertEqual(rule_model._get_field(groups_model, "name").ttype, "char")
+
+    def test_timeline(self):
+        self.groups_rule.subscribe()
+        log_model = self.env["auditlog.log"]
+        group = self.env["res.groups"].create({"name": "testgroup timeline"})
+        for i in range(3):
+            group.write({"name": "testgroup timeline %s" % i})
+        logs = log_model.search(
+            [
+                ("model_id", "=", self.groups_model_id),
+                ("res_id", "=", group.id),
+                ("method", "in", ["create", "write"]),
+            ],
+            order="create_date desc, id desc",
+        )
+        self.assertEqual(len(logs), 4)
+        page = log_model.get_timeline(model="res.groups", res_id=group.id, limit=3)
+        self.assertEqual([log["id"] for log in page["logs"]], logs[:3].ids)
+        self.assertIn("name", [line["field_name"] for line in page["logs"][0]["lines"]])
+        page = log_model.get_timeline(
+            model="res.groups", res_id=group.id, limit=3, after=page["next"]
+        )
+        self.assertEqual([log["id"] for log in page["logs"]], logs[3:].ids)
+        self.assertIsNone(page["next"])
+        page = log_model.get_timeline(user_id=self.env.uid, limit=1)
+        self.assertEqual(page["logs"][0]["user_id"][0], self.env.uid)
+
+    def test_x2many_names(self):
+        """Names of related records are resolved for the whole batch, deleted
+        records are logged as such."""
+        self.groups_rule.subscribe()
+        implied = self.env["res.groups"].create(
+            [{"name": "implied group 1"}, {"name": "implied group 2"}]
+        )
+        groups = self.env["res.groups"].create(
+            [
+                {"name": "testgroup x2many 1", "implied_ids": [(6, 0, implied.ids)]},
+                {"name": "testgroup x2many 2", "implied_ids": [(6, 0, implied.ids)]},
+            ]
+        )
+        groups.write({"implied_ids": [(2, implied[0].id)]})
+        lines = (
+            self.env["auditlog.log"]
+            .search(
+                [
+                    ("model_id", "=", self.groups_model_id),
+                    ("method", "=", "write"),
+                    ("res_id", "in", groups.ids),
+                ]
+            )
+            .mapped("line_ids")
+        )
+        implied_lines = lines.filtered(lambda line: line.field_name == "implied_ids")
+        self.assertEqual(len(implied_lines), 2)
+        for line in implied_lines:
+            self.assertIn("DELETED", line.old_value_text)
+            self.assertIn("implied group 2", line.old_value_text)
+            self.assertNotIn("implied group 1", line.new_value_text)
+
+    def test_coalesce_writes(self):
+        """The writes of a transaction on a record are logged at once, with
+        the value before the first write and after the last one."""
+        self.groups_rule.write({"coalesce_writes": True})
+        self.groups_rule.subscribe()
+        group = self.env["res.groups"].create({"name": "testgroup coalesce"})
+        group.write({"name": "testgroup coalesce 2"})
+        group.write({"name": "testgroup coalesce 3", "comment": "coalesced"})
+        domain = [
+            ("model_id", "=", self.groups_model_id),
+            ("method", "=", "write"),
+            ("res_id", "=", group.id),
+        ]
+        self.assertFalse(self.env["auditlog.log"].search(domain))
+        self.env.cr.precommit.run()
+        log = self.env["auditlog.log"].search(domain).ensure_one()
+        name_line = log.line_ids.filtered(lambda line: line.field_name == "name")
+        self.assertEqual(name_line.old_value, "testgroup coalesce")
+        self.assertEqual(name_line.new_value, "testgroup coalesce 3")
+        self.assertIn("comment", log.line_ids.mapped("field_name"))
+
+    def test_coalesce_writes_savepoint(self):
+        """The writes rolled back to a savepoint are not logged."""
+        self.groups_rule.write({"coalesce_writes": True})
+        self.groups_rule.subscribe()
+        group = self.env["res.groups"].create({"name": "testgroup coalesce"})
+        group.write({"name": "testgroup coalesce 2"})
+        with self.assertRaises(UserError):
+            with self.env.cr.savepoint():
+                group.write({"name": "testgroup rolled back", "comment": "lost"})
+                raise UserError("Rolled back")
+        self.env.cr.precommit.run()
+        log = self.env["auditlog.log"].search(
+            [
+                ("model_id", "=", self.groups_model_id),
+                ("method", "=", "write"),
+                ("res_id", "=", group.id),
+            ]
+        )
+        self.assertEqual(log.line_ids.field_name, "name")
+        self.assertEqual(log.line_ids.new_value, "testgroup coalesce 2")
+        self.assertFalse(
+            self.env["auditlog.log.queue"].search([("res_model", "=", "res.groups")])
+        )
+
+    def test_value_diff(self):
+        """Text representations equal to the values are not stored."""
+        self.groups_rule.subscribe()
+        group = self.env["res.groups"].create({"name": "testgroup diff"})
+        group.write({"name": "testgroup diff 2"})
+        log = self.env["auditlog.log"].search(
+            [
+                ("model_id", "=", self.groups_model_id),
+                ("method", "=", "write"),
+                ("res_id", "=", group.id),
+            ]
+        )
+        line = log.line_ids.filtered(lambda line: line.field_name == "name")
+        self.assertEqual(
+            line.value_diff, {"old": "testgroup diff", "new": "testgroup diff 2"}
+        )
+        self.assertEqual(line.old_value_text, "testgroup diff")
+        self.assertEqual(line.new_value, "testgroup diff 2")
+        # The values are searchable
+        line_model = self.env["auditlog.log.line"]
+        domain = [("log_id", "=", log.id)]
+        for field_name, operator, value in (
+            ("old_value", "=", "testgroup diff"),
+            ("old_value_text", "ilike", "GROUP DIFF"),
+            ("new_value", "in", ["testgroup diff 2"]),
+            ("new_value_text", "=like", "testgroup diff _"),
+            ("new_value", "!=", "other"),
+        ):
+            self.assertIn(
+                line, line_model.search(domain + [(field_name, operator, value)])
+            )
+        self.assertNotIn(
+            line, line_model.search(domain + [("new_value", "not ilike", "diff 2")])
+        )
+        self.assertNotIn(line, line_model.search(domain + [("old_value", "=", False)]))
+
+    def test_materialized_line_view(self):
+        self.groups_rule.subscribe()
+        line_view = self.env["auditlog.log.line.view"]
+        self.env["ir.config_parameter"].sudo().set_param(
+            "auditlog.materialized_line_view", "True"
+        )
+        line_view._cron_refresh()
+        self.assertEqual(tools.table_kind(self.env.cr, line_view._table), "r")
+        group = self.env["res.groups"].create({"name": "testgroup materialized"})
+        domain = [("model_id", "=", self.groups_model_id), ("res_id", "=", group.id)]
+        self.assertFalse(line_view.search(domain))
+        # The pending lines are copied whatever their id
+        group2 = self.env["res.groups"].create({"name": "testgroup materialized 2"})
+        domain2 = [("model_id", "=", self.groups_model_id), ("res_id", "=", group2.id)]
+        self.env.cr.execute(
+            "DELETE FROM auditlog_log_line_view_pending WHERE id IN %s",
+            (tuple(self.env["auditlog.log"].search(domain).line_ids.ids),),
+        )
+        line_view._refresh()
+        self.assertTrue(line_view.search(domain2))
+        self.assertFalse(line_view.search(domain))
+        line_view._add_pending(self.env["auditlog.log"].search(domain).line_ids.ids)
+        line_view._cron_refresh()
+        lines = line_view.search(domain)
+        self.assertTrue(lines)
+        self.assertEqual(
+            lines.log_id, self.env["auditlog.log"].search(domain).ensure_one()
+        )
+        lines.log_id.unlink()
+        self.assertFalse(line_view.search(domain))
+        self.env["ir.config_parameter"].sudo().set_param(
+            "auditlog.materialized_line_view", "False"
+        )
+        line_view._cron_refresh()
+        self.assertEqual(tools.table_kind(self.env.cr, line_view._table), "v")
+
 
 class TestAuditlogFast(TransactionCase, AuditlogCommon):
     def setUp(self):
@@ -235,6 +527,144 @@ class TestAuditlogFast(TransactionCase, AuditlogCommon):
         self.groups_rule.unlink()
         super(TestAuditlogFast, self).tearDown()
 
+    def test_noop_write(self):
+        """Unchanged values are not logged, nor writes changing nothing."""
+        self.groups_rule.subscribe()
+        group = self.env["res.groups"].create(
+            {"name": "testgroup noop", "comment": "unchanged"}
+        )
+        domain = [
+            ("model_id", "=", self.groups_model_id),
+            ("method", "=", "write"),
+            ("res_id", "=", group.id),
+        ]
+        group.write({"name": "testgroup noop", "comment": "unchanged"})
+        self.assertFalse(self.env["auditlog.log"].search(domain))
+        group.write({"name": "testgroup noop 2", "comment": "unchanged"})
+        log = self.env["auditlog.log"].search(domain).ensure_one()
+        self.assertEqual(log.line_ids.mapped("field_name"), ["name"])
+        self.assertEqual(log.line_ids.old_value, "testgroup noop")
+
+    def test_shallow_snapshot(self):
+        """Only the audited values are kept, binary values are summarized."""
+        rule_model = self.env["auditlog.rule"]
+        image = base64.b64encode(b"fake image")
+        category_vals = {"name": "snapshot category"}
+        vals_list = [
+            {
+                "name": "snapshot partner",
+                "image_1920": image,
+                "category_id": [(0, 0, category_vals)],
+                "unknown_field": "ignored",
+            }
+        ]
+        snapshot = rule_model._snapshot_vals_list(self.env["res.partner"], vals_list)
+        self.assertEqual(len(snapshot), 1)
+        self.assertNotIn("unknown_field", snapshot[0])
+        self.assertEqual(snapshot[0]["name"], "snapshot partner")
+        self.assertIn(hashlib.sha1(image).hexdigest(), snapshot[0]["image_1920"])
+        self.assertEqual(snapshot[0]["category_id"], [(0, 0, category_vals)])
+        self.assertIsNot(snapshot[0]["category_id"][0][2], category_vals)
+        # The shallow snapshot is used by the fast log
+        self.groups_rule.write({"snapshot_mode": "shallow"})
+        self.groups_rule.subscribe()
+        group = self.env["res.groups"].create({"name": "testgroup snapshot"})
+        log = self.env["auditlog.log"].search(
+            [
+                ("model_id", "=", self.groups_model_id),
+                ("method", "=", "create"),
+                ("res_id", "=", group.id),
+            ]
+        )
+        self.assertEqual(log.line_ids.new_value, "testgroup snapshot")
+
+    def test_import_summary(self):
+        """An import is logged by one summary log and a sample of full logs."""
+        self.groups_rule.write({"import_log_mode": "summary", "import_sample_size": 1})
+        self.groups_rule.subscribe()
+        result = self.env["res.groups"].load(
+            ["name"], [["testgroup import %s" % i] for i in range(3)]
+        )
+        self.assertFalse(result["messages"])
+        group_ids = result["ids"]
+        self.assertEqual(len(group_ids), 3)
+        logs = self.env["auditlog.log"].search(
+            [("model_id", "=", self.groups_model_id), ("method", "=", "create")]
+        )
+        summary = logs.filtered("res_ids")
+        self.assertEqual(len(summary), 1)
+        self.assertEqual(sorted(summary.res_ids), sorted(group_ids))
+        self.assertEqual(logs.filtered("res_id").mapped("res_id"), group_ids[:1])
+        # Records created outside of an import are all logged in full
+        self.env["res.groups"].create([{"name": "testgroup no import"}] * 2)
+        self.assertEqual(
+            self.env["auditlog.log"].search_count(
+                [
+                    ("model_id", "=", self.groups_model_id),
+                    ("method", "=", "create"),
+                    ("res_id", "!=", False),
+                ]
+            ),
+            3,
+        )
+
+
+class TestAuditlogSmart(TransactionCase, AuditlogCommon):
+    def setUp(self):
+        super(TestAuditlogSmart, self).setUp()
+        self.groups_model_id = self.env.ref("base.model_res_groups").id
+        self.groups_rule = self.env["auditlog.rule"].create(
+            {
+                "name": "testrule for groups",
+                "model_id": self.groups_model_id,
+                "log_read": True,
+                "log_create": True,
+                "log_write": True,
+                "log_unlink": True,
+                "log_type": "smart",
+            }
+        )
+
+    def tearDown(self):
+        self.groups_rule.unlink()
+        super(TestAuditlogSmart, self).tearDown()
+
+    def test_smart_write_fields(self):
+        """Only the written fields and their stored dependents are read."""
+        rule_model = self.env["auditlog.rule"]
+        partner_model = self.env["res.partner"]
+        fields_list = rule_model.get_auditlog_write_fields(
+            partner_model, {"name": "test"}
+        )
+        self.assertIn("name", fields_list)
+        self.assertIn("commercial_company_name", fields_list)
+        self.assertNotIn("email", fields_list)
+
+        partner_rule = rule_model.create(
+            {
+                "name": "testrule for partners",
+                "model_id": self.env.ref("base.model_res_partner").id,
+                "log_create": False,
+                "log_write": True,
+                "log_unlink": False,
+                "log_type": "smart",
+            }
+        )
+        partner_rule.subscribe()
+        partner = partner_model.create({"name": "smart company", "is_company": True})
+        partner.write({"name": "smart company 2"})
+        log = self.env["auditlog.log"].search(
+            [
+                ("model_id", "=", partner_rule.model_id.id),
+                ("method", "=", "write"),
+                ("res_id", "=", partner.id),
+            ]
+        )
+        field_names = log.line_ids.mapped("field_name")
+        self.assertIn("name", field_names)
+        self.assertIn("commercial_company_name", field_names)
+        partner_rule.unlink()
+
 
 class TestFieldRemoval(TransactionCase):
     @classmethod
@@ -459,6 +889,17 @@ class AuditLogRuleTestForUserFields(TransactionCase):
 
         # Checking log lines not created for phone
         self.assertTrue("phone" not in field_names)
+        self.assertTrue("mobile" in field_names)
+        # No log when only excluded fields change
+        write_domain = [
+            ("model_id", "=", self.auditlog_rule.model_id.id),
+            ("method", "=", "write"),
+            ("res_id", "=", self.testpartner1.id),
+        ]
+        nb_write_logs = self.auditlog_log.search_count(write_domain)
+        self.assertNotEqual(self.testpartner1.phone, "456")
+        self.testpartner1.with_context(tracking_disable=True).write({"phone": "456"})
+        self.assertEqual(self.auditlog_log.search_count(write_domain), nb_write_logs)
 
         # Removing created log record
         create_log_record.unlink()
@@ -468,6 +909,7 @@ class AuditLogRuleTestForUserFields(TransactionCase):
         self.testpartner1.with_context(tracking_disable=True).write(
             {
                 "phone": "1234567890",
+                "mobile": "0987654321",
             }
         )
         # Checking log is created for testpartner1
@@ -547,3 +989,162 @@ class AuditLogRuleTestForUserFields(TransactionCase):
 
         # Removing auditlog_rule
         self.auditlog_rule.unlink()
+
+
+class TestAuditlogDeferred(TransactionCase):
+    def setUp(self):
+        super(TestAuditlogDeferred, self).setUp()
+        self.groups_model_id = self.env.ref("base.model_res_groups").id
+        self.groups_rule = self.env["auditlog.rule"].create(
+            {
+                "name": "testrule for groups",
+                "model_id": self.groups_model_id,
+                "log_read": False,
+                "log_create": True,
+                "log_write": True,
+                "log_unlink": True,
+                "log_type": "deferred",
+            }
+        )
+        self.groups_rule.subscribe()
+
+    def tearDown(self):
+        self.groups_rule.unlink()
+        super(TestAuditlogDeferred, self).tearDown()
+
+    def test_deferred_logs(self):
+        queue_model = self.env["auditlog.log.queue"]
+        group = self.env["res.groups"].create({"name": "testgroup deferred"})
+        group.write({"name": "testgroup deferred 2"})
+        group_id, group_name = group.id, group.display_name
+        group.unlink()
+        # The operations are queued, nothing is logged yet
+        entries = queue_model.search([("res_model", "=", "res.groups")])
+        self.assertEqual(entries.mapped("method"), ["create", "write", "unlink"])
+        self.assertFalse(
+            self.env["auditlog.log"].search(
+                [("model_id", "=", self.groups_model_id), ("res_id", "=", group_id)]
+            )
+        )
+        queue_model._cron_process_queue()
+        self.assertFalse(entries.exists())
+        logs = self.env["auditlog.log"].search(
+            [("model_id", "=", self.groups_model_id), ("res_id", "=", group_id)]
+        )
+        self.assertEqual(sorted(logs.mapped("method")), ["create", "unlink", "write"])
+        self.assertEqual(set(logs.mapped("log_type")), {"deferred"})
+        unlink_log = logs.filtered(lambda log: log.method == "unlink")
+        self.assertEqual(unlink_log.name, group_name)
+        write_log = logs.filtered(lambda log: log.method == "write")
+        self.assertEqual(write_log.line_ids.field_name, "name")
+
+    def test_deferred_logs_savepoint(self):
+        """The operations rolled back to a savepoint are not queued."""
+        queue_model = self.env["auditlog.log.queue"]
+        group = self.env["res.groups"].create({"name": "testgroup deferred"})
+        with self.assertRaises(UserError):
+            with self.env.cr.savepoint():
+                group.write({"name": "testgroup deferred 2"})
+                self.env["res.groups"].create({"name": "testgroup rolled back"})
+                raise UserError("Rolled back")
+        entries = queue_model.search([("res_model", "=", "res.groups")])
+        self.assertEqual(entries.mapped("method"), ["create"])
+        queue_model._cron_process_queue()
+        logs = self.env["auditlog.log"].search(
+            [("model_id", "=", self.groups_model_id)]
+        )
+        self.assertEqual(logs.mapped("method"), ["create"])
+        self.assertEqual(logs.res_id, group.id)
+
+    def test_deferred_logs_error(self):
+        """An entry which cannot be processed does not block the queue."""
+        queue_model = self.env["auditlog.log.queue"]
+        bad_entry = queue_model.create(
+            {
+                "model_id": self.groups_model_id,
+                "res_model": "res.groups",
+                "method": "write",
+                "data": "not json",
+            }
+        )
+        group = self.env["res.groups"].create({"name": "testgroup deferred error"})
+        self.env.cr.precommit.run()
+        entries = queue_model.search([("res_model", "=", "res.groups")]) - bad_entry
+        self.assertTrue(entries)
+        with self.assertLogs("odoo.addons.auditlog.models.log_queue", "ERROR"):
+            queue_model._cron_process_queue(limit=1)
+        self.assertFalse(entries.exists())
+        self.assertTrue(bad_entry.exists())
+        self.assertTrue(bad_entry.error)
+        self.assertTrue(
+            self.env["auditlog.log"].search(
+                [("model_id", "=", self.groups_model_id), ("res_id", "=", group.id)]
+            )
+        )
+
+
+class TestAuditlogReadAccess(TransactionCase):
+    def setUp(self):
+        super(TestAuditlogReadAccess, self).setUp()
+        self.groups_model_id = self.env.ref("base.model_res_groups").id
+        self.groups_rule = self.env["auditlog.rule"].create(
+            {
+                "name": "testrule for groups",
+                "model_id": self.groups_model_id,
+                "log_read": True,
+                "log_read_mode": "ids",
+                "read_rate_limit": 2,
+                "log_create": False,
+                "log_write": False,
+                "log_unlink": False,
+                "log_type": "fast",
+            }
+        )
+        self.groups_rule.subscribe()
+        self.env.registry._auditlog_read_counters.clear()
+
+    def tearDown(self):
+        self.groups_rule.unlink()
+        super(TestAuditlogReadAccess, self).tearDown()
+
+    def test_read_access_logs(self):
+        groups = self.env["res.groups"].create(
+            [{"name": "testgroup read %s" % i} for i in range(3)]
+        )
+        groups[:2].read(["name"])
+        groups[1:2].read(["name"])
+        # Over the rate limit
+        groups[2:].read(["name"])
+        self.env.cr.precommit.run()
+        log = self.env["auditlog.log"].search(
+            [("model_id", "=", self.groups_model_id), ("method", "=", "read")]
+        )
+        self.assertEqual(len(log), 1)
+        self.assertEqual(log.res_ids, groups[:2].ids)
+        self.assertFalse(log.line_ids)
+        self.assertEqual(
+            self.env["auditlog.log"].search([("accessed_res_id", "=", groups[1].id)]),
+            log,
+        )
+        self.assertFalse(
+            self.env["auditlog.log"].search([("accessed_res_id", "=", groups[2].id)])
+        )
+
+    def test_read_access_savepoint(self):
+        """The reads rolled back to a savepoint are not logged."""
+        groups = self.env["res.groups"].create(
+            [{"name": "testgroup read %s" % i} for i in range(2)]
+        )
+        with self.assertRaises(UserError):
+            with self.env.cr.savepoint():
+                groups[0].read(["name"])
+                raise UserError("Rolled back")
+        groups[1].read(["name"])
+        self.env.cr.precommit.run()
+        log = self.env["auditlog.log"].search(
+            [("model_id", "=", self.groups_model_id), ("method", "=", "read")]
+        )
+        self.assertEqual(log.res_ids, groups[1].ids)
+        self.assertFalse(
+            self.env["auditlog.log.queue"].search([("res_model", "=", "res.groups")])
+        )
@@ -2,6 +2,9 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 import time
 
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
 from odoo.tests.common import TransactionCase
 
 
@@ -42,3 +45,87 @@ class TestAuditlogAutovacuum(TransactionCase):
             [("model_id", "=", self.groups_model_id), ("res_id", "=", group.id)]
         )
         self.assertEqual(nb_logs, 0)
+
+    def test_autovacuum_sql(self):
+        log_model = self.env["auditlog.log"]
+        autovacuum_model = self.env["auditlog.autovacuum"]
+        groups = self.env["res.groups"].create(
+            [{"name": "testgroup sql 1"}, {"name": "testgroup sql 2"}]
+        )
+        domain = [("model_id", "=", self.groups_model_id), ("res_id", "in", groups.ids)]
+        logs = log_model.search(domain)
+        self.assertEqual(len(logs), 2)
+        lines = logs.mapped("line_ids")
+        self.assertTrue(lines)
+        # Milliseconds are ignored by autovacuum, waiting 1s ensure that
+        # the logs generated will be processed by the vacuum
+        time.sleep(1)
+        autovacuum_model.autovacuum(days=0, chunk_size=1, mode="sql")
+        self.assertEqual(log_model.search_count(domain), 0)
+        self.assertFalse(lines.exists())
+
+    def test_autovacuum_partitions(self):
+        partition_model = self.env["auditlog.partition"]
+        log_model = self.env["auditlog.log"]
+        self.env["ir.config_parameter"].sudo().set_param(
+            "auditlog.partitioning", "True"
+        )
+        partition_model._cron_manage_partitions()
+        self.assertTrue(partition_model._is_partitioned("auditlog_log"))
+        self.assertTrue(partition_model._is_partitioned("auditlog_log_line"))
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        logs = log_model.search(
+            [("model_id", "=", self.groups_model_id), ("res_id", "=", group.id)]
+        )
+        self.assertTrue(logs.line_ids)
+        # Move the logs to a month which is over for long
+        last_year = fields.Date.today() - relativedelta(years=1)
+        for table in ("auditlog_log", "auditlog_log_line"):
+            partition_model._create_partitions(table, last_year, last_year)
+        self.env.cr.execute(
+            "UPDATE auditlog_log SET create_date = %s WHERE id IN %s",
+            (last_year, tuple(logs.ids)),
+        )
+        self.env.cr.execute(
+            "UPDATE auditlog_log_line SET create_date = %s WHERE id IN %s",
+            (last_year, tuple(logs.line_ids.ids)),
+        )
+        self.env["auditlog.autovacuum"].autovacuum(days=180)
+        self.assertFalse(logs.exists())
+        self.env.cr.execute(
+            "SELECT count(*) FROM auditlog_log_line WHERE log_id IN %s",
+            (tuple(logs.ids),),
+        )
+        self.assertEqual(self.env.cr.fetchone()[0], 0)
+
+    def test_partition_from_default(self):
+        """Rows of a month without partition are moved out of the default
+        partition when the partition of their month is created."""
+        partition_model = self.env["auditlog.partition"]
+        log_model = self.env["auditlog.log"]
+        self.env["ir.config_parameter"].sudo().set_param(
+            "auditlog.partitioning", "True"
+        )
+        partition_model._cron_manage_partitions()
+        group = self.env["res.groups"].create({"name": "testgroup default"})
+        logs = log_model.search(
+            [("model_id", "=", self.groups_model_id), ("res_id", "=", group.id)]
+        )
+        self.assertTrue(logs)
+        self.env["base"].flush()
+        next_years = fields.Date.today() + relativedelta(years=2)
+        self.env.cr.execute(
+            "UPDATE auditlog_log SET create_date = %s WHERE id IN %s",
+            (next_years, tuple(logs.ids)),
+        )
+        self.env.cr.execute("SELECT count(*) FROM auditlog_log_default")
+        self.assertEqual(self.env.cr.fetchone()[0], len(logs))
+        partition_model._cron_manage_partitions(months_ahead=25)
+        partition = partition_model._partition_name("auditlog_log", next_years)
+        self.env.cr.execute('SELECT id FROM "%s"' % partition)
+        self.assertEqual(
+            sorted(row[0] for row in self.env.cr.fetchall()), sorted(logs.ids)
+        )
+        self.env.cr.execute("SELECT count(*) FROM auditlog_log_default")
+        self.assertEqual(self.env.cr.fetchone()[0], 0)
+        self.assertEqual(logs.exists(), logs)
@@ -0,0 +1,225 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import logging
+import time
+
+from odoo.tests.common import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+# Rules of the overhead matrix, `None` being the unaudited baseline
+BENCHMARK_RULES = {
+    "baseline": None,
+    "full": {"log_type": "full", "log_create": True, "log_write": True},
+    "fast": {"log_type": "fast", "log_create": True, "log_write": True},
+    "read": {"log_type": "full", "log_read": True, "log_unlink": False},
+}
+BENCHMARK_SIZES = (1, 100, 10000)
+BENCHMARK_READ_FIELDS = ["name", "email", "phone", "comment", "category_id"]
+
+
+@tagged("-standard", "auditlog_benchmark")
+class TestAuditlogBenchmark(TransactionCase):
+    """Measure the cost of audit logging.
+
+    Not part of the standard test run, launch it with
+    ``--test-tags auditlog_benchmark``.
+    """
+
+    nb_records = 10000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner_model_id = cls.env.ref("base.model_res_partner").id
+        cls.partners = (
+            cls.env["res.partner"]
+            .with_context(tracking_disable=True)
+            .create([{"name": "bench partner %s" % i} for i in range(cls.nb_records)])
+        )
+
+    def _timed_write(self, vals):
+        self.partners.invalidate_cache()
+        start = time.perf_counter()
+        self.partners.with_context(tracking_disable=True).write(vals)
+        self.env["base"].flush()
+        return time.perf_counter() - start
+
+    def test_write_logging_cost(self):
+        """Compare the audited write against the same write without rule, and
+        batched log insertion against one `create_logs()` call per record."""
+        baseline = self._timed_write({"comment": "baseline"})
+        rule = self.env["auditlog.rule"].create(
+            {
+                "name": "benchmark rule",
+                "model_id": self.partner_model_id,
+                "log_read": False,
+                "log_create": False,
+                "log_write": True,
+                "log_unlink": False,
+                "log_type": "fast",
+            }
+        )
+        rule.subscribe()
+        audited = self._timed_write({"comment": "audited"})
+        rule_model = self.env["auditlog.rule"].sudo()
+        new_values = {id_: {"comment": "per record"} for id_ in self.partners.ids}
+        old_values = {id_: {"comment": False} for id_ in self.partners.ids}
+        start = time.perf_counter()
+        for res_id in self.partners.ids:
+            rule_model.create_logs(
+                self.env.uid,
+                "res.partner",
+                [res_id],
+                "write",
+                old_values,
+                new_values,
+                {"log_type": "fast"},
+            )
+        self.env["base"].flush()
+        per_record = time.perf_counter() - start
+        start = time.perf_counter()
+        rule_model.create_logs(
+            self.env.uid,
+            "res.partner",
+            self.partners.ids,
+            "write",
+            old_values,
+            new_values,
+            {"log_type": "fast"},
+        )
+        self.env["base"].flush()
+        batched = time.perf_counter() - start
+        rule.unlink()
+        ms = 1000.0 / self.nb_records
+        _logger.info(
+            "AUDITLOG BENCHMARK - write on %s records: unaudited %.3f ms/record, "
+            "audited %.3f ms/record, logging per record %.3f ms/record, "
+            "batched logging %.3f ms/record",
+            self.nb_records,
+            baseline * ms,
+            audited * ms,
+            per_record * ms,
+            batched * ms,
+        )
+        self.assertEqual(
+            self.env["auditlog.log"].search_count(
+                [
+                    ("model_id", "=", self.partner_model_id),
+                    ("res_id", "in", self.partners.ids),
+                ]
+            ),
+            3 * self.nb_records,
+        )
+
+    def _count_log_rows(self):
+        self.env["base"].flush()
+        self.env.cr.execute("""SELECT (SELECT count(*) FROM auditlog_log),
+                (SELECT count(*) FROM auditlog_log_line)""")
+        return sum(self.env.cr.fetchone())
+
+    def _measure(self, operation):
+        """Run `operation` and return its wall time in seconds, the number of
+        SQL queries it made and the number of log rows it inserted."""
+        rows = self._count_log_rows()
+        queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        operation()
+        self.env["base"].flush()
+        duration = time.perf_counter() - start
+        return (
+            duration,
+            self.env.cr.sql_log_count - queries,
+            self._count_log_rows() - rows,
+        )
+
+    def _run_operations(self, size):
+        """Create, write, read and unlink `size` partners, return the
+        measures of each operation."""
+        partner_model = self.env["res.partner"].with_context(tracking_disable=True)
+        vals_list = [
+            {"name": "bench matrix %s" % i, "email": "bench%s@example.com" % i}
+            for i in range(size)
+        ]
+        partners = partner_model.browse()
+
+        def create():
+            nonlocal partners
+            partners = partner_model.create(vals_list)
+
+        def write():
+            partners.write({"comment": "benchmark", "phone": "+1 555 0100"})
+
+        def read():
+            partners.invalidate_cache()
+            partners.read(BENCHMARK_READ_FIELDS)
+
+        def unlink():
+            partners.unlink()
+
+        return [
+            (name, self._measure(operation))
+            for name, operation in (
+                ("create", create),
+                ("write", write),
+                ("read", read),
+                ("unlink", unlink),
+            )
+        ]
+
+    def test_overhead_matrix(self):
+        """Report the wall time, SQL queries and log rows of each operation,
+        for each rule and number of records, against the unaudited baseline."""
+        results = {}
+        for rule_name, rule_vals in BENCHMARK_RULES.items():
+            rule = self.env["auditlog.rule"]
+            if rule_vals:
+                rule = rule.create(
+                    dict(
+                        {
+                            "name": "benchmark %s rule" % rule_name,
+                            "model_id": self.partner_model_id,
+                            "log_read": False,
+                            "log_create": False,
+                            "log_write": False,
+                            "log_unlink": True,
+                        },
+                        **rule_vals
+                    )
+                )
+                rule.subscribe()
+            for size in BENCHMARK_SIZES:
+                for operation, measures in self._run_operations(size):
+                    results[rule_name, size, operation] = measures
+            rule.unlink()
+        _logger.info(
+            "AUDITLOG BENCHMARK - %-8s %6s %-6s %10s %10s %8s %8s %8s",
+            "rule",
+            "size",
+            "op",
+            "ms",
+            "x base",
+            "queries",
+            "+queries",
+            "rows",
+        )
+        for (rule_name, size, operation), measures in results.items():
+            duration, queries, rows = measures
+            base_duration, base_queries, __ = results["baseline", size, operation]
+            _logger.info(
+                "AUDITLOG BENCHMARK - %-8s %6s %-6s %10.1f %10.2f %8s %8s %8s",
+                rule_name,
+                size,
+                operation,
+                duration * 1000,
+                duration / base_duration if base_duration else 0,
+                queries,
+                queries - base_queries,
+                rows,
+            )
+        for size in BENCHMARK_SIZES:
+            self.assertFalse(
+                any(results["baseline", size, op][2] for op in ("create", "write")),
+                "The baseline must not log anything",
+            )
+            # One log per record created by the full rule, with its lines
+            self.assertGreater(results["full", size, "create"][2], size)
@@ -0,0 +1,110 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import base64
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+
+class TestAuditlogExport(TransactionCase):
+    def setUp(self):
+        super(TestAuditlogExport, self).setUp()
+        self.groups_model_id = self.env.ref("base.model_res_groups").id
+        self.groups_rule = self.env["auditlog.rule"].create(
+            {
+                "name": "testrule for groups",
+                "model_id": self.groups_model_id,
+                "log_read": False,
+                "log_create": True,
+                "log_write": True,
+                "log_unlink": True,
+                "log_type": "full",
+            }
+        )
+        self.groups_rule.subscribe()
+        self.groups = self.env["res.groups"].create(
+            [{"name": "testgroup export %s" % i} for i in range(3)]
+        )
+        self.logs = self.env["auditlog.log"].search(
+            [("model_id", "=", self.groups_model_id), ("res_id", "in", self.groups.ids)]
+        )
+        self.assertEqual(len(self.logs), 3)
+
+    def tearDown(self):
+        self.groups_rule.unlink()
+        super(TestAuditlogExport, self).tearDown()
+
+    def _export(self, **vals):
+        today = fields.Date.today()
+        export = self.env["auditlog.export"].create(
+            dict(
+                {
+                    "date_from": today - timedelta(days=1),
+                    "date_to": today + timedelta(days=1),
+                    "chunk_size": 2,
+                },
+                **vals
+            )
+        )
+        export.action_export()
+        return [
+            gzip.decompress(base64.b64decode(attachment.datas)).decode()
+            for attachment in export.attachment_ids
+        ]
+
+    def test_export_jsonl(self):
+        files = self._export(file_format="jsonl")
+        exported = {}
+        for content in files:
+            for line in content.splitlines():
+                log = json.loads(line)
+                exported[log["id"]] = log
+        self.assertGreaterEqual(len(files), 2)
+        for log in self.logs:
+            self.assertEqual(exported[log.id]["res_id"], log.res_id)
+            self.assertEqual(
+                {line["field"] for line in exported[log.id]["lines"]},
+                set(log.line_ids.mapped("field_name")),
+            )
+        self.assertTrue(self.logs.exists())
+
+    def test_export_csv_delete(self):
+        files = self._export(file_format="csv", delete_exported=True)
+        rows = [
+            row for content in files for row in csv.DictReader(io.StringIO(content))
+        ]
+        self.assertTrue(set(self.logs.ids) <= {int(row["id"]) for row in rows})
+        self.assertFalse(self.logs.exists())
+
+    def test_cron_export(self):
+        """The files of the cron stay attached to a persistent archive."""
+        last_month = fields.Date.today().replace(day=1) - timedelta(days=1)
+        self.env.cr.execute(
+            "UPDATE auditlog_log SET create_date = %s WHERE id IN %s",
+            (last_month, tuple(self.logs.ids)),
+        )
+        archive_model = self.env["auditlog.export.archive"]
+        archives = archive_model.search([])
+        self.env["auditlog.export"]._cron_export_last_month(delete_exported=True)
+        archive = archive_model.search([]) - archives
+        self.assertEqual(len(archive), 1)
+        self.assertEqual(archive.date_to, last_month)
+        self.assertTrue(archive.logs_deleted)
+        self.assertGreaterEqual(archive.nb_logs, 3)
+        self.assertFalse(self.logs.exists())
+        # The wizard is gone with the transient vacuum, not the files
+        self.env["auditlog.export"].search([]).unlink()
+        self.assertTrue(archive.attachment_ids)
+        self.assertEqual(
+            set(archive.attachment_ids.mapped("res_model")), {archive._name}
+        )
+        content = "".join(
+            gzip.decompress(base64.b64decode(attachment.datas)).decode()
+            for attachment in archive.attachment_ids
+        )
+        exported_ids = {json.loads(line)["id"] for line in content.splitlines()}
+        self.assertTrue(set(self.logs.ids) <= exported_ids)
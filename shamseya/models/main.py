@@ -1,9 +1,41 @@
 # -*- coding: utf-8 -*-
 
+import logging
+import re
+
+import psycopg2
+
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.osv import expression
 from dateutil.relativedelta import relativedelta
 
+_logger = logging.getLogger(__name__)
+
+# spellings folded together in the search keys of the cases
+ARABIC_FOLDING = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ة': 'ه',
+    'ى': 'ي', 'ئ': 'ي',
+    'ؤ': 'و',
+    'ـ': None,  # tatweel
+    **{chr(c): None for c in range(0x064B, 0x0653)},  # tashkeel
+    **{chr(0x0660 + i): str(i) for i in range(10)},  # arabic-indic digits
+    **{chr(0x06F0 + i): str(i) for i in range(10)},
+})
+
+
+def normalize_name(name):
+    return ' '.join((name or '').translate(ARABIC_FOLDING).lower().split())
+
+
+def normalize_digits(number):
+    return re.sub(r'\D', '', (number or '').translate(ARABIC_FOLDING))
+
+
+def escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
 
 class ResUsers(models.Model):
     _inherit = 'res.users'
@@ -11,6 +43,45 @@ class ResUsers(models.Model):
     seq = fields.Many2one('ir.sequence', string=_('Sequence'))
     next_code = fields.Integer(readonly=0, related='seq.number_next_actual')
 
+    def _get_case_sequence(self):
+        self.ensure_one()
+        return (self.seq or self.env.ref('shamseya.seq_case')).sudo()
+
+    def _allocate_case_codes(self, count):
+        """Return `count` new case codes from the sequence of the user.
+
+        A standard sequence gives its numbers with a single query calling
+        nextval(), which never locks: concurrent batches get distinct
+        numbers, and the numbers of a rolled back batch are lost.
+
+        A "no gap" sequence is incremented once for the whole batch, and its
+        row stays locked until the end of the transaction, which is what
+        keeps the numbers gap-free. A concurrent batch then fails with a
+        serialization error once the lock is released, and its transaction
+        is retried like for any concurrency error.
+        """
+        self.ensure_one()
+        if count <= 0:
+            return []
+        seq = self._get_case_sequence()
+        if seq.use_date_range:
+            numbers = [seq._next() for i in range(count)]
+        elif seq.implementation == 'standard':
+            self.env.cr.execute(
+                "SELECT nextval('ir_sequence_%03d') FROM generate_series(1, %%s)" % seq.id, (count,))
+            numbers = [seq.get_next_char(number) for number in sorted(r[0] for r in self.env.cr.fetchall())]
+        else:
+            # one lock per batch instead of one per case
+            self.env.cr.execute("""
+                UPDATE ir_sequence SET number_next = number_next + number_increment * %s
+                WHERE id = %s RETURNING number_next - number_increment * %s, number_increment
+            """, (count, seq.id, count))
+            first, increment = self.env.cr.fetchone()
+            seq.invalidate_cache(['number_next', 'number_next_actual'], seq.ids)
+            numbers = [seq.get_next_char(first + i * increment) for i in range(count)]
+        prefix = self.prefix or '_'
+        return [f'{prefix}/{number}' for number in numbers]
+
 
 
 class Case(models.Model):
@@ -47,12 +118,7 @@ class Case(models.Model):
             if len(ns) > 3:
                 rec.name4 = rec.name4 or ' '.join(ns[3:])
 
-    def get_code(self):
-        serial = self.env.user.next_code
-        prefix = self.env.user.prefix or '_'
-        return f'{prefix}/{serial}'
-
-    code = fields.Char(default=get_code, readonly=1)
+    code = fields.Char(readonly=1, copy=False)
 
     is_case = fields.Boolean()
     created_by = fields.Many2one('res.partner', default=lambda self: self.create_uid.partner_id,
@@ -77,6 +143,60 @@ class Case(models.Model):
             rec.age = age_y
             rec.age_m = age_m
 
+    @api.model
+    def _get_age_update_days(self, last_run, today):
+        """Return the days of the month of the birth dates whose age changed
+        after `last_run`, until `today`, or None if all of them may have."""
+        if not last_run or (today - last_run).days >= 28:
+            return None
+        days = set()
+        day = last_run
+        while day < today:
+            day += relativedelta(days=1)
+            days.add(day.day)
+            if (day + relativedelta(days=1)).month != day.month:
+                # the ages of the days missing from the month change on its last day
+                days.update(range(day.day + 1, 32))
+        return days
+
+    @api.model
+    def _cron_update_ages(self, batch_size=10000):
+        """Recompute the ages which changed since the last run, in SQL batches.
+        Called from a cron every night."""
+        cr = self.env.cr
+        params = self.env['ir.config_parameter'].sudo()
+        today = fields.Date.today()
+        last_run = fields.Date.to_date(params.get_param('shamseya.age_last_run'))
+        days = self._get_age_update_days(last_run, today)
+        if days == set():
+            return True
+        where = 'date_of_birth IS NOT NULL AND date_of_birth < %(today)s'
+        if days is not None:
+            # served by res_partner_birth_day_index
+            where += ' AND EXTRACT(DAY FROM date_of_birth) IN %(days)s'
+        query_params = {'today': today, 'days': tuple(days or ()), 'last_id': 0, 'limit': batch_size}
+        nb_updated = 0
+        while True:
+            cr.execute(f"""
+                SELECT id, date_of_birth FROM res_partner
+                WHERE {where} AND id > %(last_id)s ORDER BY id LIMIT %(limit)s
+            """, query_params)
+            rows = cr.fetchall()
+            if not rows:
+                break
+            ages = [relativedelta(today, date_of_birth) for __, date_of_birth in rows]
+            cr.execute("""
+                UPDATE res_partner p SET age = v.age, age_m = v.age_m
+                FROM (SELECT unnest(%s::int[]) AS id, unnest(%s::int[]) AS age, unnest(%s::int[]) AS age_m) v
+                WHERE p.id = v.id AND (p.age, p.age_m) IS DISTINCT FROM (v.age, v.age_m)
+            """, ([row[0] for row in rows], [age.years for age in ages], [age.months for age in ages]))
+            nb_updated += cr.rowcount
+            query_params['last_id'] = rows[-1][0]
+        self.invalidate_cache(['age', 'age_m'])
+        params.set_param('shamseya.age_last_run', fields.Date.to_string(today))
+        _logger.info('%s case ages updated', nb_updated)
+        return True
+
     phone = fields.Char(string='رقم الموبايل', required=1)
     phone2 = fields.Char(string='رقم الواتساب')
 
@@ -148,6 +268,57 @@ class Case(models.Model):
     mother_name = fields.Char()
     personal_id_number = fields.Char(required=1)
 
+    # normalized keys of the case search, see _name_search()
+    search_name = fields.Char(compute='_compute_search_keys', store=1)
+    search_phones = fields.Char(compute='_compute_search_keys', store=1)
+    search_id_number = fields.Char(compute='_compute_search_keys', store=1, index=True)
+
+    @api.depends('name', 'phone', 'phone2', 'personal_id_number')
+    def _compute_search_keys(self):
+        for rec in self:
+            rec.search_name = normalize_name(rec.name)
+            rec.search_phones = ' '.join(filter(None, map(normalize_digits, [rec.phone, rec.phone2])))
+            rec.search_id_number = normalize_digits(rec.personal_id_number)
+
+    def init(self):
+        super().init()
+        cr = self.env.cr
+        cr.execute('CREATE INDEX IF NOT EXISTS res_partner_birth_day_index '
+                   'ON res_partner ((EXTRACT(DAY FROM date_of_birth)))')
+        cr.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if not cr.fetchone():
+            try:
+                with cr.savepoint():
+                    cr.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            except psycopg2.Error:
+                _logger.warning('pg_trgm is not available, the case search keys are not indexed')
+                return
+        for column in ('search_name', 'search_phones', 'search_id_number'):
+            cr.execute(f'CREATE INDEX IF NOT EXISTS res_partner_{column}_trgm_index '
+                       f'ON res_partner USING gin ({column} gin_trgm_ops)')
+
+    @api.model
+    def _name_search(self, name, args=None, operator='ilike', limit=100, name_get_uid=None):
+        """Search the cases on their normalized name, phones and national ID,
+        through the trigram indexes, first, then complete the results with
+        the default partner search (email, reference...)."""
+        key = normalize_name(name)
+        if not key or operator != 'ilike':
+            return super()._name_search(name, args=args, operator=operator, limit=limit, name_get_uid=name_get_uid)
+        domain = [('search_name', '=like', f'%{escape_like(key)}%')]
+        digits = normalize_digits(name)
+        if len(digits) >= 3:
+            domain = expression.OR([
+                domain, [('search_phones', '=like', f'%{digits}%')], [('search_id_number', '=like', f'%{digits}%')]])
+        ids = list(self._search(expression.AND([args or [], domain]), limit=limit,
+                                access_rights_uid=name_get_uid))
+        if limit and len(ids) >= limit:
+            return ids
+        other_ids = super()._name_search(
+            name, args=expression.AND([args or [], [('id', 'not in', ids)]]), operator=operator,
+            limit=limit and limit - len(ids), name_get_uid=name_get_uid)
+        return ids + [id_ for id_ in other_ids if id_ not in ids]
+
     personal_id_card = fields.Many2many('ir.attachment', 'personal_id_card_rel')
     insurance_card = fields.Many2many('ir.attachment', 'insurance_card_rel')
     health_card = fields.Many2many('ir.attachment', 'health_card_rel')
@@ -163,8 +334,10 @@ class Case(models.Model):
     requests_count = fields.Integer(compute='_compute_requests_count', string='Requests Count')
 
     def _compute_requests_count(self):
+        data = self.env['case.request'].read_group([('case_id', 'in', self.ids)], ['case_id'], ['case_id'])
+        counts = {d['case_id'][0]: d['case_id_count'] for d in data}
         for rec in self:
-            rec.requests_count = len(rec.requests)
+            rec.requests_count = counts.get(rec.id, 0)
 
     def open_requests(self):
         self.ensure_one()
@@ -197,22 +370,11 @@ class Case(models.Model):
         }
         return action
 
-    @api.model
-    def create(self, vals):
-        res = super().create(vals)
-        serial = self.env.user.seq.next_by_id()
-        prefix = self.env.user.prefix or '_'
-        res.code = f'{prefix}/{serial}'
-        return res
-
-    def unlink(self):
-        seq = str(self.env.user.next_code-1).zfill(self.env.user.seq.padding)
-        print(seq)
-        print(self.code)
-        if self.code.endswith(seq):
-            print('un')
-            self.env.user.next_code -= 1
-        return super().unlink()
+    @api.model_create_multi
+    def create(self, vals_list):
+        codes = self.env.user._allocate_case_codes(len(vals_list))
+        vals_list = [dict(vals, code=code) for vals, code in zip(vals_list, codes)]
+        return super().create(vals_list)
 
 
 class CaseRequest(models.Model):
@@ -318,8 +480,10 @@ class CaseRequest(models.Model):
     issues_count = fields.Integer(compute='_compute_issues_count', string='Issues Count')
 
     def _compute_issues_count(self):
+        data = self.env['follow.up.issue'].read_group([('request_id', 'in', self.ids)], ['request_id'], ['request_id'])
+        counts = {d['request_id'][0]: d['request_id_count'] for d in data}
         for rec in self:
-            rec.issues_count = len(rec.issues)
+            rec.issues_count = counts.get(rec.id, 0)
 
     def open_issues(self):
         self.ensure_one()
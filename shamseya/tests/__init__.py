@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+from . import test_case_code
+from . import test_case_import
+from . import test_case_search
+from . import test_case_age
+from . import test_case_counts
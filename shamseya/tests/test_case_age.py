@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests import common, tagged
+
+
+@tagged('-at_install', 'post_install')
+class TestCaseAge(common.TransactionCase):
+
+    def _create_case(self, date_of_birth):
+        return self.env['res.partner'].create({
+            'name': f'age case {date_of_birth}',
+            'phone': '01000000000',
+            'personal_id_number': str(date_of_birth),
+            'date_of_birth': date_of_birth,
+        })
+
+    def _run_cron(self, today, last_run, batch_size=10000):
+        self.env['ir.config_parameter'].set_param('shamseya.age_last_run', last_run or False)
+        with patch.object(fields.Date, 'today', return_value=today):
+            self.env['res.partner']._cron_update_ages(batch_size=batch_size)
+
+    def test_update_days(self):
+        days = self.env['res.partner']._get_age_update_days
+        self.assertEqual(days(date(2023, 3, 14), date(2023, 3, 15)), {15})
+        self.assertEqual(days(date(2023, 3, 15), date(2023, 3, 15)), set())
+        # month ends: the missing days change on the last day of the month
+        self.assertEqual(days(date(2023, 2, 27), date(2023, 2, 28)), {28, 29, 30, 31})
+        self.assertEqual(days(date(2024, 2, 28), date(2024, 2, 29)), {29, 30, 31})
+        self.assertEqual(days(date(2023, 4, 29), date(2023, 5, 1)), {30, 31, 1})
+        self.assertEqual(days(date(2023, 3, 30), date(2023, 3, 31)), {31})
+        # everything after a long gap or without a previous run
+        self.assertIsNone(days(date(2023, 1, 1), date(2023, 2, 1)))
+        self.assertIsNone(days(None, date(2023, 2, 1)))
+
+    def test_cron_update_ages(self):
+        with patch.object(fields.Date, 'today', return_value=date(2023, 2, 27)):
+            leap_day = self._create_case(date(2000, 2, 29))
+            day_31 = self._create_case(date(1990, 1, 31))
+            other_day = self._create_case(date(1990, 3, 15))
+        self.assertEqual((leap_day.age, leap_day.age_m), (22, 11))
+        self.assertEqual((day_31.age, day_31.age_m), (33, 0))
+        self.assertEqual((other_day.age, other_day.age_m), (32, 11))
+        self.env['base'].flush()
+        # stale on purpose: the birth day is not selected, so it is not updated
+        self.env.cr.execute('UPDATE res_partner SET age = 0 WHERE id = %s', (other_day.id,))
+        self._run_cron(date(2023, 2, 28), '2023-02-27', batch_size=1)
+        self.assertEqual((leap_day.age, leap_day.age_m), (23, 0))
+        self.assertEqual((day_31.age, day_31.age_m), (33, 1))
+        self.assertEqual(other_day.age, 0)
+        self.assertEqual(
+            self.env['ir.config_parameter'].get_param('shamseya.age_last_run'), '2023-02-28')
+        # nothing changes on the next day for the leap day birthday
+        self._run_cron(date(2023, 3, 1), '2023-02-28')
+        self.assertEqual((leap_day.age, leap_day.age_m), (23, 0))
+        # a full run without a previous one
+        self._run_cron(date(2023, 3, 15), False, batch_size=2)
+        self.assertEqual((other_day.age, other_day.age_m), (33, 0))
+        self.assertEqual((day_31.age, day_31.age_m), (33, 1))
+        self.assertEqual((leap_day.age, leap_day.age_m), (23, 0))
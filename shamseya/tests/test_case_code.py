@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+import random
+import threading
+import time
+
+import psycopg2
+from psycopg2 import errorcodes
+
+import odoo
+from odoo import api, SUPERUSER_ID
+from odoo.tests import common, tagged
+
+WORKERS = 8
+BATCHES = 5
+BATCH_SIZE = 20
+MAX_TRIES = 10
+# errors of the concurrent updates of a "no gap" sequence, the transaction
+# is retried as Odoo does for the requests
+CONCURRENCY_ERRORS = (errorcodes.SERIALIZATION_FAILURE, errorcodes.DEADLOCK_DETECTED)
+
+
+@tagged('-at_install', 'post_install')
+class TestCaseCode(common.TransactionCase):
+
+    def test_batch_codes(self):
+        seq = self.env['ir.sequence'].create({'name': 'test case codes', 'padding': 3})
+        self.env.user.write({'seq': seq.id, 'prefix': 'T'})
+        codes = self.env.user._allocate_case_codes(3)
+        self.assertEqual(codes, ['T/001', 'T/002', 'T/003'])
+        case = self.env['res.partner'].create({
+            'name': 'test case', 'phone': '01000000000', 'personal_id_number': '1'})
+        self.assertEqual(case.code, 'T/004')
+        # the "no gap" implementation starts again from number_next, which a
+        # standard sequence does not update
+        seq.implementation = 'no_gap'
+        self.assertEqual(self.env.user._allocate_case_codes(2), ['T/001', 'T/002'])
+        self.assertEqual(self.env.user.next_code, 3)
+
+
+@tagged('-at_install', 'post_install')
+class TestCaseCodeConcurrency(common.BaseCase):
+    """Create cases from concurrent transactions, which have to be committed."""
+
+    def setUp(self):
+        super().setUp()
+        self.registry = odoo.registry(common.get_db_name())
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            self.user_id = env.ref('base.user_admin').id
+            self.old_seq_id = env['res.users'].browse(self.user_id).seq.id
+            self.seq_id = env['ir.sequence'].create({'name': 'test concurrent case codes'}).id
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['res.partner'].search([('name', '=like', 'stress case %')]).unlink()
+            env['res.users'].browse(self.user_id).seq = self.old_seq_id
+            env['ir.sequence'].browse(self.seq_id).unlink()
+
+    def _create_batch(self, worker, batch):
+        for attempt in range(MAX_TRIES):
+            try:
+                with self.registry.cursor() as cr:
+                    env = api.Environment(cr, self.user_id, {'tracking_disable': True})
+                    env['res.partner'].create([{
+                        'name': f'stress case {worker} {batch} {i}',
+                        'phone': '01000000000',
+                        'personal_id_number': f'{worker}{batch}{i}',
+                    } for i in range(BATCH_SIZE)])
+                return attempt
+            except psycopg2.OperationalError as e:
+                if e.pgcode not in CONCURRENCY_ERRORS or attempt == MAX_TRIES - 1:
+                    raise
+                time.sleep(random.uniform(0.0, 0.05 * 2 ** attempt))
+
+    def _create_cases(self, worker, errors, retries):
+        try:
+            for batch in range(BATCHES):
+                retries.append(self._create_batch(worker, batch))
+        except Exception as e:
+            errors.append(e)
+
+    def _run_workers(self, implementation):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            seq = env['ir.sequence'].browse(self.seq_id)
+            seq.write({'implementation': implementation, 'number_next': 1})
+            env['res.users'].browse(self.user_id).seq = seq
+        errors = []
+        retries = []
+        threads = [
+            threading.Thread(target=self._create_cases, args=(worker, errors, retries))
+            for worker in range(WORKERS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(errors)
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            cases = env['res.partner'].search([('name', '=like', 'stress case %')])
+            codes = cases.mapped('code')
+            self.assertEqual(len(cases), WORKERS * BATCHES * BATCH_SIZE)
+            self.assertEqual(len(set(codes)), len(codes))
+            cases.unlink()
+        return codes, retries
+
+    def test_concurrent_standard(self):
+        codes, retries = self._run_workers('standard')
+        # nextval() does not lock: no transaction had to be retried
+        self.assertEqual(sum(retries), 0)
+
+    def test_concurrent_no_gap(self):
+        codes, retries = self._run_workers('no_gap')
+        # committed transactions only: no number is skipped
+        numbers = sorted(int(code.rsplit('/', 1)[1]) for code in codes)
+        self.assertEqual(numbers, list(range(1, len(codes) + 1)))
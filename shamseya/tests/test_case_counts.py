@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests import common, tagged
+
+
+@tagged('-at_install', 'post_install')
+class TestCaseCounts(common.TransactionCase):
+
+    def test_counts(self):
+        cases = self.env['res.partner'].create([{
+            'name': f'count case {i}',
+            'phone': '01000000000',
+            'personal_id_number': str(i),
+            'is_case': True,
+        } for i in range(3)])
+        service = self.env['basic.service'].create({'name': 'count service'})
+        requests = self.env['case.request'].create([
+            {'case_id': cases[0].id, 'basic_service': service.id},
+            {'case_id': cases[0].id, 'basic_service': service.id},
+            {'case_id': cases[1].id, 'basic_service': service.id},
+        ])
+        self.env['follow.up.issue'].create([
+            {'name': f'issue {i}', 'number': str(i), 'request_id': requests[0].id}
+            for i in range(2)
+        ])
+        self.env['base'].flush()
+        cases.invalidate_cache()
+        requests.invalidate_cache()
+        self.assertEqual(cases.mapped('requests_count'), [2, 1, 0])
+        self.assertEqual(requests.mapped('issues_count'), [2, 0, 0])
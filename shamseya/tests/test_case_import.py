@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+
+from odoo.tests import common, tagged
+
+_logger = logging.getLogger(__name__)
+
+SIZE = 10000
+
+
+@tagged('-standard', 'shamseya_benchmark')
+class TestCaseImportBenchmark(common.TransactionCase):
+    """Create 10k cases the way an import does, run with
+    --test-tags shamseya_benchmark."""
+
+    def test_import_10k(self):
+        seq = self.env['ir.sequence'].create({'name': 'benchmark case codes'})
+        self.env.user.seq = seq
+        vals_list = [{
+            'name': f'benchmark case {i}',
+            'phone': '01000000000',
+            'personal_id_number': str(i),
+            'is_case': True,
+        } for i in range(SIZE)]
+        partners = self.env['res.partner'].with_context(tracking_disable=True)
+        self.env['base'].flush()
+        queries = self.cr.sql_log_count
+        start = time.monotonic()
+        cases = partners.create(vals_list)
+        self.env['base'].flush()
+        duration = time.monotonic() - start
+        queries = self.cr.sql_log_count - queries
+        _logger.info('%s cases created in %.1fs (%.0f cases/s), %s queries',
+                     SIZE, duration, SIZE / duration, queries)
+        codes = cases.mapped('code')
+        self.assertEqual(len(set(codes)), SIZE)
+        self.assertTrue(all(codes))
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests import common, tagged
+
+
+@tagged('-at_install', 'post_install')
+class TestCaseSearch(common.TransactionCase):
+
+    def test_name_search(self):
+        case = self.env['res.partner'].create({
+            'name': 'أحمد فاطمة',
+            'phone': '01012345678',
+            'personal_id_number': '٢٩٠٠١٠١',
+        })
+        self.assertEqual(case.search_name, 'احمد فاطمه')
+        self.assertEqual(case.search_id_number, '2900101')
+        partners = self.env['res.partner']
+        for name in ('احمد فاطمه', 'أحمد فاطمة', '012345', '2900101'):
+            ids = [res[0] for res in partners.name_search(name)]
+            self.assertIn(case.id, ids, name)
+
+    def test_name_search_merge(self):
+        case = self.env['res.partner'].create({
+            'name': 'zzsearch case',
+            'phone': '01012345678',
+            'personal_id_number': '1',
+        })
+        other = self.env['res.partner'].create({
+            'name': 'other partner',
+            'email': 'zzsearch@example.com',
+            'phone': '01012345678',
+            'personal_id_number': '2',
+        })
+        ids = [res[0] for res in self.env['res.partner'].name_search('zzsearch')]
+        # the key matches first, then the default search on the email
+        self.assertEqual(ids, [case.id, other.id])
+        ids = [res[0] for res in self.env['res.partner'].name_search('zzsearch', limit=1)]
+        self.assertEqual(ids, [case.id])